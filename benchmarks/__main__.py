@@ -0,0 +1,74 @@
+"""Run the offline benchmark suite.
+
+	python -m benchmarks                      print results
+	python -m benchmarks --save base.json     also store them as a baseline
+	python -m benchmarks --compare base.json  flag regressions against a baseline
+
+Results are microseconds per operation, lower is better.
+"""
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import platform
+import sys
+
+import pydantic
+
+from . import bench_auth, bench_fanout, bench_lookup, bench_schema, bench_token
+
+STAGES = {
+	'token': bench_token.run,
+	'auth': bench_auth.run,
+	'schema': bench_schema.run,
+	'lookup': bench_lookup.run,
+	'fanout': bench_fanout.run,
+}
+
+
+def _environment() -> dict[str, str]:
+	return {
+		'python': platform.python_version(),
+		'pydantic': pydantic.VERSION,
+		'machine': platform.machine(),
+		'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+	}
+
+
+def main() -> int:
+	parser = ArgumentParser(prog='benchmarks')
+	parser.add_argument('-s', '--stage', action='append', choices=STAGES, help='Only run these stages')
+	parser.add_argument('--save', type=Path, help='Write results to this baseline file')
+	parser.add_argument('--compare', type=Path, help='Compare results with this baseline file')
+	parser.add_argument('--threshold', type=float, default=0.15, help='Relative slowdown reported as a regression')
+	args = parser.parse_args()
+
+	results: dict[str, float] = {}
+	for name in args.stage or STAGES:
+		stage = STAGES[name]()
+		if not stage:
+			print(f'{name}: skipped', file=sys.stderr)
+		results.update(stage)
+
+	baseline = json.loads(args.compare.read_text())['results'] if args.compare else {}
+	regressions = 0
+	for key, value in results.items():
+		line = f'{key:<32}{value:>12.2f}'
+		if (base := baseline.get(key)) is not None:
+			change = value / base - 1
+			regressed = change > args.threshold
+			regressions += regressed
+			line += f'{base:>12.2f}{change:>+9.1%}{"  REGRESSION" if regressed else ""}'
+		print(line)
+
+	if args.save:
+		args.save.write_text(json.dumps({
+			'environment': _environment(),
+			'results': results,
+		}, indent=2) + '\n')
+
+	return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
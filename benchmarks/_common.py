@@ -0,0 +1,32 @@
+"""Shared helpers for the offline benchmarks."""
+from pathlib import Path
+from timeit import Timer
+from typing import Any, Callable, Coroutine
+import sys
+
+ROOT = Path(__file__).resolve().parent
+PAYLOADS = ROOT / 'payloads'
+
+# import the api package directly, the integration package needs homeassistant
+sys.path.insert(0, str(ROOT.parent / 'custom_components' / 'nissan_connect'))
+
+
+def load_payload(name: str) -> bytes:
+	return (PAYLOADS / f'{name}.json').read_bytes()
+
+
+def measure(fn: Callable[[], object], *, repeat: int = 5) -> float:
+	"""Best time per call in microseconds."""
+	timer = Timer(fn)
+	number, _ = timer.autorange()
+	return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def drive(coro: Coroutine[Any, Any, Any]) -> Any:
+	"""Run a coroutine that completes without suspending, e.g. a cache hit."""
+	try:
+		coro.send(None)
+	except StopIteration as stop:
+		return stop.value
+	coro.close()
+	raise RuntimeError('coroutine suspended, it needs an event loop')
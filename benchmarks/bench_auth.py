@@ -0,0 +1,21 @@
+"""Auth header injection with a fresh token."""
+from time import time
+
+from requests import Request
+
+from ._common import drive, measure
+
+from api.auth import AsyncTokenAuth, TokenAuth
+from api.token import SimpleTokenStorage, Token
+
+
+def run() -> dict[str, float]:
+	token = Token('r', 'a' * 900, 'i' * 900, int(time()) + 3600, int(time()))
+	auth = TokenAuth(token_storage=SimpleTokenStorage(token))
+	async_auth = AsyncTokenAuth(None, token_storage=SimpleTokenStorage(token))  # type: ignore[arg-type]
+	prepared = Request('GET', 'https://example.invalid/').prepare()
+
+	return {
+		'token_auth.__call__': measure(lambda: auth(prepared)),
+		'async_token_auth.headers': measure(lambda: drive(async_auth.headers())),
+	}
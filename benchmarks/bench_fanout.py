@@ -0,0 +1,113 @@
+"""Coordinator refresh fan-out to the 19 status and location entities of one vehicle.
+
+Needs homeassistant, the stage is skipped when it is not installed.
+"""
+from datetime import timedelta
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import asyncio
+import logging
+
+from ._common import ROOT, load_payload
+
+from api.schema import (
+	LockState,
+	location_status_adapter,
+	vehicle_status_adapter,
+)
+from api.service_history import ServiceHistory
+
+
+class _StubVehicle():
+	"""Serves decoded payloads, alternating lock state when `changing`."""
+	vin = 'BENCHMARKVIN00000'
+
+	def __init__(self):
+		self.status = vehicle_status_adapter.validate_json(load_payload('vehicle_status'))
+		self.location_status = location_status_adapter.validate_json(load_payload('location'))
+		self.changing = False
+		self.service_requests = ServiceHistory()
+		self._service_history = load_payload('service_history')
+
+	async def vehicle_status(self):
+		if self.changing:
+			locked = self.status.lockStatus.lockStatus == LockState.LOCKED
+			self.status = self.status.model_copy(update={
+				'lockStatus': self.status.lockStatus.model_copy(update={
+					'lockStatus': LockState.UNLOCKED if locked else LockState.LOCKED,
+				}),
+			})
+		return self.status
+
+	async def location(self):
+		return self.location_status
+
+	async def sync_service_history(self):
+		return self.service_requests.sync(self._service_history)
+
+
+async def _async_run(rounds: int) -> dict[str, float]:
+	import sys
+	sys.path.insert(0, str(ROOT.parent))
+
+	from homeassistant.core import HomeAssistant
+
+	from custom_components.nissan_connect.binary_sensor import (
+		LOCK_SENSORS,
+		MALFUNCTION_SENSORS,
+		NissanLockSensor,
+		NissanMalfunctionIndicatorLamp,
+	)
+	from custom_components.nissan_connect.coordinator import (
+		AdaptiveInterval,
+		NissanDataUpdateCoordinator,
+	)
+	from custom_components.nissan_connect.device_tracker import TRACKER_TYPES, NissanDeviceTracker
+	from custom_components.nissan_connect.lock import LOCK_TYPES, NissanLock
+	from custom_components.nissan_connect.sensor import TIRE_SENSOR_TYPES, NissanTirePressureSensor
+
+	# entities are attached without a platform, which homeassistant warns about
+	logging.getLogger('homeassistant').setLevel(logging.ERROR)
+
+	with TemporaryDirectory() as config_dir:
+		hass = HomeAssistant(config_dir)
+		vehicle = _StubVehicle()
+		coordinator = NissanDataUpdateCoordinator(
+			hass,
+			vehicle=vehicle,  # type: ignore[arg-type]
+			interval=AdaptiveInterval(timedelta(minutes=1), timedelta(hours=1)),
+		)
+		coordinator.update_interval = None
+		await coordinator.async_refresh()
+
+		entities = [
+			*(('binary_sensor', NissanLockSensor(coordinator, d)) for d in LOCK_SENSORS),
+			*(('binary_sensor', NissanMalfunctionIndicatorLamp(coordinator, d)) for d in MALFUNCTION_SENSORS),
+			*(('sensor', NissanTirePressureSensor(coordinator, d)) for d in TIRE_SENSOR_TYPES),
+			*(('lock', NissanLock(coordinator, d)) for d in LOCK_TYPES),
+			*(('device_tracker', NissanDeviceTracker(coordinator, d)) for d in TRACKER_TYPES),
+		]
+		for i, (domain, entity) in enumerate(entities):
+			entity.hass = hass
+			entity.entity_id = f'{domain}.bench_{i}'
+			await entity.async_added_to_hass()
+			entity.async_write_ha_state()
+
+		results = {}
+		for name, changing in (('fanout.unchanged', False), ('fanout.changed', True)):
+			vehicle.changing = changing
+			start = perf_counter()
+			for _ in range(rounds):
+				await coordinator.async_refresh()
+			results[name] = (perf_counter() - start) / rounds * 1e6
+
+		await hass.async_stop(force=True)
+		return results
+
+
+def run(rounds: int = 500) -> dict[str, float]:
+	try:
+		import homeassistant  # noqa: F401
+	except ImportError:
+		return {}
+	return asyncio.run(_async_run(rounds))
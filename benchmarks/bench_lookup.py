@@ -0,0 +1,38 @@
+"""String keyed field lookups done by entity state properties."""
+from ._common import load_payload, measure
+
+from api.schema import DoorState, vehicle_status_adapter
+
+_door_keys = (
+	'doorStatusFrontLeft',
+	'doorStatusFrontRight',
+	'doorStatusRearLeft',
+	'doorStatusRearRight',
+	'engineHoodStatus',
+	'hatchStatus',
+)
+_tire_keys = ('flPressure', 'frPressure', 'rlPressure', 'rrPressure')
+
+
+def run() -> dict[str, float]:
+	status = vehicle_status_adapter.validate_json(load_payload('vehicle_status'))
+
+	def lock_sensors():
+		# NissanLockSensor.is_on
+		for key in _door_keys:
+			status.lockStatus[key] == DoorState.OPEN
+
+	def tire_sensors():
+		# NissanTirePressureSensor.native_value
+		for key in _tire_keys:
+			status.pressure[key].value
+
+	def attribute_access():
+		status.lockStatus.doorStatusFrontLeft == DoorState.OPEN
+
+	return {
+		'lookup.lock_sensors': measure(lock_sensors),
+		'lookup.tire_sensors': measure(tire_sensors),
+		'lookup.getitem': measure(lambda: status.lockStatus['doorStatusFrontLeft'] == DoorState.OPEN),
+		'lookup.getattr': measure(attribute_access),
+	}
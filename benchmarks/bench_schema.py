@@ -0,0 +1,61 @@
+"""Schema decoding of recorded responses.
+
+`python -m benchmarks.bench_schema` compares the dict-then-model decode path
+with validating straight from bytes.
+"""
+import json
+
+from pydantic import TypeAdapter
+
+from ._common import load_payload, measure
+
+from api.schema import (
+	RequestStatus,
+	Service,
+	VehicleStatus,
+	service_adapter,
+	service_history_adapter,
+	vehicle_status_adapter,
+)
+
+_service_payloads: dict[Service, str] = {
+	Service.DOOR: 'request_status',
+	Service.ENGINE: 'request_status',
+	Service.HORN_AND_LIGHTS: 'request_status',
+	Service.SERVICE_HISTORY: 'service_history',
+	Service.LOCATION: 'location',
+	Service.VEHICLE_STATUS: 'vehicle_status',
+}
+
+
+def run() -> dict[str, float]:
+	results = {}
+	for service, name in _service_payloads.items():
+		adapter, raw = service_adapter(service), load_payload(name)
+		results[f'decode.{service.name.lower()}'] = measure(lambda: adapter.validate_json(raw))
+	return results
+
+
+def main():
+	status = load_payload('vehicle_status')
+	history = load_payload('service_history')
+
+	cases = {
+		'vehicle_status': (
+			lambda: VehicleStatus.model_validate(json.loads(status)),
+			lambda: vehicle_status_adapter.validate_json(status),
+		),
+		'service_history': (
+			lambda: TypeAdapter(list[RequestStatus]).validate_python(json.loads(history)),
+			lambda: service_history_adapter.validate_json(history),
+		),
+	}
+
+	print(f'{"payload":<18}{"old µs":>10}{"new µs":>10}{"speedup":>10}')
+	for name, (old, new) in cases.items():
+		old_us, new_us = measure(old), measure(new)
+		print(f'{name:<18}{old_us:>10.1f}{new_us:>10.1f}{old_us / new_us:>9.2f}x')
+
+
+if __name__ == '__main__':
+	main()
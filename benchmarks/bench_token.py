@@ -0,0 +1,24 @@
+"""Token handling done for every request."""
+import json
+from time import time
+
+from ._common import measure
+
+from api.token import SimpleTokenStorage, Token
+
+
+def run() -> dict[str, float]:
+	stored = {
+		'nna_refresh_token': 'r' * 40,
+		'access_token': 'a' * 900,
+		'id_token': 'i' * 900,
+		'expires_at': int(time()) + 3600,
+		'issued_at': int(time()),
+	}
+	storage = SimpleTokenStorage(Token.from_dict(stored))
+	return {
+		'token.from_dict': measure(lambda: Token.from_dict(stored)),
+		'token.to_dict': measure(lambda: Token.from_dict(stored).to_dict()),
+		'token_storage.get': measure(storage.get),
+		'token.from_json': measure(lambda: Token.from_dict(json.loads(json.dumps(stored)))),
+	}
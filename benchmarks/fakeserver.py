@@ -0,0 +1,247 @@
+"""Local stand-in for the NissanConnect token and telematics endpoints.
+
+	python -m benchmarks.fakeserver --port 8080 --latency lognormal:40,0.5 --error-rate 0.01
+
+Point the API at it through the existing parameters:
+
+	TokenAuth(token_url='http://127.0.0.1:8080/login/token')
+	Vehicle(auth, vin, base_url='http://127.0.0.1:8080/vehicles')
+
+Any VIN is accepted, each gets its own telemetry and command state on first
+use. Remote commands stay INITIATED for `--command-duration` seconds and then
+become SUCCESS, or FAILED with `--command-failure-rate`.
+"""
+from __future__ import annotations
+from argparse import ArgumentParser
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from time import monotonic, time
+from typing import Callable
+import asyncio
+import copy
+import json
+import random
+import uuid
+
+from aiohttp import web
+
+from ._common import load_payload
+
+_command_service_types = {
+	'LOCK': 'REMOTE_DOOR_LOCK',
+	'UNLOCK': 'REMOTE_DOOR_UNLOCK',
+	'START': 'REMOTE_START',
+	'DOUBLE_START': 'REMOTE_START',
+	'STOP': 'REMOTE_ENGINE',
+	'HORN_LIGHT': 'REMOTE_HORNBLOW_LIGHTFLASH',
+	'HORN_ONLY': 'REMOTE_HORNBLOW_LIGHTFLASH',
+	'LIGHT_ONLY': 'REMOTE_HORNBLOW_LIGHTFLASH',
+}
+_command_services = ('remote-door', 'remote-engine', 'remote-horn-and-lights')
+
+
+def _now() -> str:
+	return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+	"""Parse `fixed:MS`, `uniform:LO,HI` or `lognormal:MEDIAN,SIGMA` into a sampler of seconds."""
+	kind, _, params = spec.partition(':')
+	values = [float(v) for v in params.split(',')] if params else []
+	if kind == 'fixed':
+		return lambda: values[0] / 1000
+	if kind == 'uniform':
+		return lambda: random.uniform(values[0], values[1]) / 1000
+	if kind == 'lognormal':
+		median, sigma = values
+		return lambda: random.lognormvariate(0, sigma) * median / 1000
+	raise ValueError(f'unknown latency distribution: {spec}')
+
+
+@dataclass
+class FaultConfig():
+	latency: Callable[[], float] = lambda: 0.0
+	error_rate: float = 0
+	throttle_rate: float = 0
+	retry_after: int = 1
+	token_ttl: int = 3600
+	command_duration: float = 5
+	command_failure_rate: float = 0
+
+
+@dataclass
+class CommandRequest():
+	body: dict
+	completes_at: float
+	outcome: str
+
+
+@dataclass
+class VehicleState():
+	status: dict
+	location: dict
+	requests: dict[str, CommandRequest] = field(default_factory=dict)
+
+	def request_status(self, request_id: str) -> dict:
+		request = self.requests[request_id]
+		if request.body['status'] == 'INITIATED' and monotonic() >= request.completes_at:
+			request.body['status'] = request.outcome
+			request.body['statusChangeDateTime'] = _now()
+			if request.outcome == 'SUCCESS':
+				self._apply(request.body['command'])
+		return request.body
+
+	def _apply(self, command: str):
+		lock = self.status['lockStatus']
+		if command == 'LOCK':
+			lock['lockStatus'] = 'locked'
+		elif command == 'UNLOCK':
+			lock['lockStatus'] = 'unlocked'
+		self.status['lastUpdateTime'] = _now()
+
+
+class FakeNissanConnect():
+	def __init__(self, faults: FaultConfig | None = None) -> None:
+		self.faults = faults or FaultConfig()
+		self.tokens: dict[str, float] = {}
+		self.vehicles: dict[str, VehicleState] = {}
+		self.counters: dict[str, int] = {}
+		self._status = json.loads(load_payload('vehicle_status'))
+		self._location = json.loads(load_payload('location'))
+
+	def vehicle(self, vin: str) -> VehicleState:
+		if vin not in self.vehicles:
+			location = copy.deepcopy(self._location)
+			location['location']['latitude'] += random.uniform(-0.5, 0.5)
+			location['location']['longitude'] += random.uniform(-0.5, 0.5)
+			self.vehicles[vin] = VehicleState(copy.deepcopy(self._status), location)
+		return self.vehicles[vin]
+
+	def _count(self, key: str):
+		self.counters[key] = self.counters.get(key, 0) + 1
+
+	@web.middleware
+	async def _faults(self, request: web.Request, handler):
+		await asyncio.sleep(self.faults.latency())
+		if random.random() < self.faults.throttle_rate:
+			self._count('throttled')
+			return web.json_response(
+				{'error': 'Too Many Requests'}, status=429,
+				headers={'Retry-After': str(self.faults.retry_after)},
+			)
+		if random.random() < self.faults.error_rate:
+			self._count('errors')
+			return web.json_response({'error': 'Service Unavailable'}, status=503)
+		return await handler(request)
+
+	@web.middleware
+	async def _auth(self, request: web.Request, handler):
+		if request.path.startswith('/vehicles'):
+			token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+			if self.tokens.get(token, 0) < time():
+				self._count('unauthorized')
+				return web.json_response({'error': 'invalid_token'}, status=401)
+		return await handler(request)
+
+	async def token(self, request: web.Request) -> web.Response:
+		self._count('token')
+		body = await request.json()
+		if not (body.get('refresh_token') or (body.get('email') and body.get('password'))):
+			return web.json_response({'error': 'invalid_grant'}, status=400)
+		access_token = uuid.uuid4().hex
+		self.tokens[access_token] = time() + self.faults.token_ttl
+		return web.json_response({
+			'access_token': access_token,
+			'id_token': uuid.uuid4().hex,
+			'nna_refresh_token': uuid.uuid4().hex,
+			'expires_in': self.faults.token_ttl,
+		})
+
+	async def vehicle_status(self, request: web.Request) -> web.Response:
+		self._count('vehiclestatus')
+		return web.json_response(self.vehicle(request.headers['vin']).status)
+
+	async def location(self, request: web.Request) -> web.Response:
+		self._count('location')
+		return web.json_response(self.vehicle(request.headers['vin']).location)
+
+	async def service_history(self, request: web.Request) -> web.Response:
+		self._count('service-history')
+		vehicle = self.vehicle(request.headers['vin'])
+		return web.json_response([
+			vehicle.request_status(request_id) for request_id in reversed(vehicle.requests)
+		])
+
+	async def command(self, request: web.Request) -> web.Response:
+		self._count('command')
+		body = await request.json()
+		vehicle = self.vehicle(request.headers['vin'])
+		request_id = str(uuid.uuid4())
+		failed = random.random() < self.faults.command_failure_rate
+		vehicle.requests[request_id] = CommandRequest(
+			body={
+				'serviceRequestId': request_id,
+				'serviceType': _command_service_types.get(body['command'], 'REMOTE_ENGINE'),
+				'status': 'INITIATED',
+				'activationDateTime': _now(),
+				'command': body['command'],
+			},
+			completes_at=monotonic() + self.faults.command_duration,
+			outcome='FAILED' if failed else 'SUCCESS',
+		)
+		return web.json_response({'serviceRequestId': request_id})
+
+	async def command_status(self, request: web.Request) -> web.Response:
+		self._count('command-status')
+		vehicle = self.vehicle(request.headers['vin'])
+		request_id = request.match_info['request_id']
+		if request_id not in vehicle.requests:
+			return web.json_response({'error': 'not found'}, status=404)
+		return web.json_response(vehicle.request_status(request_id))
+
+	def app(self) -> web.Application:
+		app = web.Application(middlewares=[self._faults, self._auth])
+		app.router.add_post('/login/token', self.token)
+		app.router.add_get('/vehicles/telemetry/vehiclestatus/', self.vehicle_status)
+		app.router.add_get('/vehicles/telemetry/location/', self.location)
+		app.router.add_get('/vehicles/remote-service-history/', self.service_history)
+		for service in _command_services:
+			app.router.add_post(f'/vehicles/{service}', self.command)
+			app.router.add_get(f'/vehicles/{service}/{{request_id}}', self.command_status)
+		return app
+
+
+def add_fault_arguments(parser: ArgumentParser):
+	parser.add_argument('--latency', default='fixed:0', help='fixed:MS, uniform:LO,HI or lognormal:MEDIAN,SIGMA')
+	parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with 503')
+	parser.add_argument('--throttle-rate', type=float, default=0, help='Fraction of requests answered with 429')
+	parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429')
+	parser.add_argument('--token-ttl', type=int, default=3600, help='Lifetime of issued tokens in seconds')
+	parser.add_argument('--command-duration', type=float, default=5, help='Seconds a command stays INITIATED')
+	parser.add_argument('--command-failure-rate', type=float, default=0, help='Fraction of commands that fail')
+
+
+def faults_from_args(args) -> FaultConfig:
+	return FaultConfig(
+		latency=parse_latency(args.latency),
+		error_rate=args.error_rate,
+		throttle_rate=args.throttle_rate,
+		retry_after=args.retry_after,
+		token_ttl=args.token_ttl,
+		command_duration=args.command_duration,
+		command_failure_rate=args.command_failure_rate,
+	)
+
+
+def main():
+	parser = ArgumentParser(prog='fakeserver')
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=8080)
+	add_fault_arguments(parser)
+	args = parser.parse_args()
+
+	web.run_app(FakeNissanConnect(faults_from_args(args)).app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,128 @@
+"""Drive many simulated vehicles against the fake NissanConnect server.
+
+	python -m benchmarks.loadtest --vehicles 200 --duration 30 --latency lognormal:80,0.6
+
+Every vehicle polls status and location together, like one coordinator tick,
+every `--interval` seconds, and sends a remote command with probability
+`--command-rate` per tick. All vehicles share one login and connection pool.
+The fake server runs in-process unless `--url` points at a running one.
+Throughput and latency percentiles per operation are printed as JSON.
+"""
+from __future__ import annotations
+from argparse import ArgumentParser
+from time import monotonic, perf_counter
+import asyncio
+import json
+import random
+
+from aiohttp import ClientSession, TCPConnector, web
+
+from ._common import ROOT  # noqa: F401, sets up the api import path
+from .fakeserver import FakeNissanConnect, add_fault_arguments, faults_from_args
+
+from api.auth import AsyncTokenAuth
+from api.schema import RemoteCommand
+from api.vehicle import AsyncVehicle, PollPolicy
+
+
+class Recorder():
+	def __init__(self) -> None:
+		self.latencies: dict[str, list[float]] = {}
+		self.errors: dict[str, int] = {}
+
+	async def time(self, op: str, coro):
+		start = perf_counter()
+		try:
+			return await coro
+		except Exception:
+			self.errors[op] = self.errors.get(op, 0) + 1
+		finally:
+			self.latencies.setdefault(op, []).append(perf_counter() - start)
+
+	def summary(self, elapsed: float) -> dict:
+		ops = {}
+		for op, samples in self.latencies.items():
+			samples = sorted(samples)
+			pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+			ops[op] = {
+				'count': len(samples),
+				'errors': self.errors.get(op, 0),
+				'per_second': len(samples) / elapsed,
+				'p50_ms': pick(0.50),
+				'p95_ms': pick(0.95),
+				'p99_ms': pick(0.99),
+				'max_ms': samples[-1] * 1000,
+			}
+		return ops
+
+
+async def _drive(vehicle: AsyncVehicle, recorder: Recorder, args, deadline: float):
+	# spread the first ticks so vehicles do not poll in lockstep
+	await asyncio.sleep(random.uniform(0, args.interval))
+	while monotonic() < deadline:
+		await recorder.time('tick', asyncio.gather(
+			recorder.time('vehicle_status', vehicle.vehicle_status()),
+			recorder.time('location', vehicle.location()),
+		))
+		if random.random() < args.command_rate:
+			command = random.choice((RemoteCommand.LOCK, RemoteCommand.UNLOCK))
+			await recorder.time('command', vehicle.run_command(command))
+		await asyncio.sleep(args.interval)
+
+
+async def _run(args) -> dict:
+	runner = None
+	url = args.url
+	server = None
+	if not url:
+		server = FakeNissanConnect(faults_from_args(args))
+		runner = web.AppRunner(server.app(), access_log=None)
+		await runner.setup()
+		site = web.TCPSite(runner, '127.0.0.1', 0)
+		await site.start()
+		port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+		url = f'http://127.0.0.1:{port}'
+
+	recorder = Recorder()
+	connector = TCPConnector(limit=args.pool_size)
+	async with ClientSession(connector=connector) as session:
+		auth = AsyncTokenAuth(session, token_url=f'{url}/login/token')
+		await auth.generate('loadtest@example.com', 'password')
+		policy = PollPolicy(first_delay=0.5, max_delay=5, deadline=60)
+		vehicles = [
+			AsyncVehicle(auth, f'LOADTEST{i:09d}', base_url=f'{url}/vehicles', poll_policy=policy)
+			for i in range(args.vehicles)
+		]
+
+		start = monotonic()
+		deadline = start + args.duration
+		await asyncio.gather(*(_drive(v, recorder, args, deadline) for v in vehicles))
+		elapsed = monotonic() - start
+
+	if runner:
+		await runner.cleanup()
+
+	return {
+		'vehicles': args.vehicles,
+		'elapsed_s': elapsed,
+		'operations': recorder.summary(elapsed),
+		'server': server.counters if server else None,
+	}
+
+
+def main():
+	parser = ArgumentParser(prog='loadtest')
+	parser.add_argument('--url', help='Use a running fake server instead of an in-process one')
+	parser.add_argument('--vehicles', type=int, default=50)
+	parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+	parser.add_argument('--interval', type=float, default=5, help='Seconds between ticks of a vehicle')
+	parser.add_argument('--command-rate', type=float, default=0.05, help='Chance of a command per tick')
+	parser.add_argument('--pool-size', type=int, default=20, help='Connection pool size')
+	add_fault_arguments(parser)
+	args = parser.parse_args()
+
+	print(json.dumps(asyncio.run(_run(args)), indent=2))
+
+
+if __name__ == '__main__':
+	main()
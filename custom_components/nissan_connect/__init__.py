@@ -1,27 +1,32 @@
 """Support for Nissan Connect Services."""
 from __future__ import annotations
-import asyncio
-import functools as ft
 from dataclasses import dataclass
+from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_PIN, Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
 from homeassistant.helpers import device_registry as dr
-from homeassistant.util.async_ import run_callback_threadsafe
 
-from .api.auth import TokenAuth, Token
 from .api.error import TokenAuthError
-from .api.vehicle import Vehicle
-from .api.schema import LocationStatus, VehicleStatus
+from .api.metrics import Metrics
+from .api.vehicle import AsyncVehicle, PollPolicy
 
+from .account import NissanAccount, async_get_account, async_release_account
 from .const import (
     DOMAIN,
-    CONF_TOKEN,
     CONF_VIN,
+    CONF_COMMAND_TIMEOUT,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_METRICS,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    RESPONSE_CACHE_TTL,
 )
-from .coordinator import NissanDataUpdateCoordinator
+from .coordinator import AdaptiveInterval, NissanDataUpdateCoordinator, snapshot_store
 
 PLATFORMS = [
     Platform.BINARY_SENSOR,
@@ -34,36 +39,84 @@ PLATFORMS = [
 
 @dataclass
 class RuntimeData():
-    vehicle: Vehicle
-    status: NissanDataUpdateCoordinator[VehicleStatus]
-    location: NissanDataUpdateCoordinator[LocationStatus]
+    account: NissanAccount
+    vehicle: AsyncVehicle
+    coordinator: NissanDataUpdateCoordinator
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry[RuntimeData]) -> bool:
-    auth = TokenAuth(token_storage=TokenStorage(hass, entry))
     try:
-        await hass.async_add_executor_job(auth.refresh)
+        account = await async_get_account(hass, entry)
     except TokenAuthError as err:
         raise ConfigEntryAuthFailed() from err
     except Exception as err:
         raise ConfigEntryNotReady() from err
 
+    try:
+        await _async_setup_vehicle(hass, entry, account)
+    except BaseException:
+        await async_release_account(hass, entry)
+        raise
+
+    options = dict(entry.options)
+
+    async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+        # token refreshes also update the entry, only reload on option changes
+        if entry.options != options:
+            await hass.config_entries.async_reload(entry.entry_id)
+
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    return True
+
+
+async def _async_setup_vehicle(
+    hass: HomeAssistant, entry: ConfigEntry[RuntimeData], account: NissanAccount
+) -> None:
     # Setup the coordinator and set up all platforms
-    vehicle = Vehicle(auth, entry.data[CONF_VIN], pin=entry.data[CONF_PIN])
+    metrics = None
+    if entry.options.get(CONF_METRICS, False):
+        metrics = Metrics()
+        # token refreshes are shared by the account and counted once for it
+        if account.auth.metrics is None:
+            account.auth.metrics = Metrics()
+    vehicle = AsyncVehicle(
+        account.auth, entry.data[CONF_VIN], pin=entry.data[CONF_PIN],
+        poll_policy=PollPolicy(
+            deadline=entry.options.get(CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT),
+        ),
+        cache_ttl=RESPONSE_CACHE_TTL,
+        metrics=metrics,
+        rate_limiter=account.rate_limiter,
+        breakers=account.breakers,
+    )
+    entry.async_on_unload(vehicle.commands.close)
+    entry.async_on_unload(vehicle.requests.close)
     data = entry.runtime_data = RuntimeData(
+        account=account,
         vehicle=vehicle,
-        location=NissanDataUpdateCoordinator(
-            hass, vehicle=vehicle, method=Vehicle.location,
-        ),
-        status=NissanDataUpdateCoordinator(
-            hass, vehicle=vehicle, method=Vehicle.vehicle_status,
+        coordinator=NissanDataUpdateCoordinator(
+            hass,
+            vehicle=vehicle,
+            interval=AdaptiveInterval(
+                timedelta(minutes=entry.options.get(
+                    CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL
+                )),
+                timedelta(minutes=entry.options.get(
+                    CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
+                )),
+            ),
         ),
     )
 
-    await asyncio.gather(
-        data.location.async_config_entry_first_refresh(),
-        data.status.async_config_entry_first_refresh(),
-    )
+    # a removed entry deletes its snapshot after the unload, nothing may write it later
+    entry.async_on_unload(data.coordinator.async_flush_snapshot)
+
+    # start from the last known snapshot and refresh in the background,
+    # blocking setup on the cloud only when nothing was stored yet
+    restored = await data.coordinator.async_restore()
+    if not restored:
+        await data.coordinator.async_config_entry_first_refresh()
 
     device_registry = dr.async_get(hass)
     device_registry.async_get_or_create(
@@ -76,29 +129,19 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry[RuntimeData]
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    return True
+    if restored:
+        entry.async_create_background_task(
+            hass, data.coordinator.async_refresh(), f'{data.coordinator.name} refresh'
+        )
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-
+    if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        await async_release_account(hass, entry)
+    return unload_ok
 
-class TokenStorage():
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
-        self.hass = hass
-        self.entry = entry
 
-    def get(self) -> Token:
-        return Token.from_dict(self.entry.data[CONF_TOKEN])
-
-    def set(self, token: Token):
-        """Handle from sync context when token is updated."""
-        run_callback_threadsafe(
-            self.hass.loop,
-            ft.partial(
-                self.hass.config_entries.async_update_entry,
-                self.entry,
-                data={**self.entry.data, CONF_TOKEN: token.to_dict()},
-            ),
-        ).result()
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted snapshot of a deleted entry."""
+    await snapshot_store(hass, entry.data[CONF_VIN]).async_remove()
@@ -0,0 +1,167 @@
+"""Account level state shared by every vehicle of one Nissan login."""
+from __future__ import annotations
+import asyncio
+import functools as ft
+import threading
+from dataclasses import dataclass, field
+
+from aiohttp import ClientSession, TCPConnector
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from homeassistant.util.async_ import run_callback_threadsafe
+
+from .api.auth import AsyncTokenAuth, Token, TokenRenewer
+from .api.const import NISSAN_TENANT_ID
+from .api.error import MissingTokenError, TokenAuthError
+from .api.breaker import CircuitBreaker
+from .api.ratelimit import RateLimiter
+from .api.schema import Service
+
+from .const import (
+    DOMAIN,
+    CONF_TOKEN,
+    CONF_POOL_SIZE,
+    CONF_POOL_SIZE_PER_HOST,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_POOL_SIZE_PER_HOST,
+    TOKEN_RENEW_FRACTION,
+)
+
+AccountKey = tuple[str, str]
+
+
+class AccountTokenStorage():
+    """Token storage shared by all config entries of an account.
+
+    The freshest token of the registered entries is used, and every
+    refreshed token is written back to all of them.
+    """
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.entries: dict[str, ConfigEntry] = {}
+        self._token: Token | None = None
+
+    def add(self, entry: ConfigEntry):
+        """Register an entry, validating its stored token without a request."""
+        try:
+            token = Token.from_dict(entry.data[CONF_TOKEN])
+        except (KeyError, TypeError, ValueError) as err:
+            raise TokenAuthError(f'Stored token of {entry.title} is invalid') from err
+        if not token.nna_refresh_token:
+            raise TokenAuthError(f'Stored token of {entry.title} cannot be refreshed')
+
+        self.entries[entry.entry_id] = entry
+        if not self._token or token.expires_at > self._token.expires_at:
+            self._token = token
+
+    def remove(self, entry: ConfigEntry):
+        self.entries.pop(entry.entry_id, None)
+
+    def get(self) -> Token:
+        if not self._token:
+            raise MissingTokenError()
+        return self._token
+
+    def set(self, token: Token):
+        """Handle from either the event loop or a sync context when token is updated."""
+        self._token = token
+        if threading.get_ident() == self.hass.loop_thread_id:
+            self._async_write(token)
+        else:
+            run_callback_threadsafe(
+                self.hass.loop, ft.partial(self._async_write, token)
+            ).result()
+
+    def _async_write(self, token: Token):
+        for entry in self.entries.values():
+            self.hass.config_entries.async_update_entry(
+                entry, data={**entry.data, CONF_TOKEN: token.to_dict()},
+            )
+
+
+@dataclass
+class NissanAccount():
+    session: ClientSession
+    auth: AsyncTokenAuth
+    renewer: TokenRenewer
+    storage: AccountTokenStorage
+    rate_limiter: RateLimiter
+    # outages are account wide, so are the circuits of the polled endpoints
+    breakers: dict[Service, CircuitBreaker] = field(default_factory=dict)
+
+    @property
+    def entry_ids(self) -> set[str]:
+        return set(self.storage.entries)
+
+
+@dataclass
+class AccountRegistry():
+    accounts: dict[AccountKey, NissanAccount] = field(default_factory=dict)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+def _account_key(entry: ConfigEntry) -> AccountKey:
+    return (entry.data.get(CONF_USERNAME, entry.entry_id), NISSAN_TENANT_ID)
+
+
+def _registry(hass: HomeAssistant) -> AccountRegistry:
+    return hass.data.setdefault(DOMAIN, AccountRegistry())
+
+
+async def async_get_account(hass: HomeAssistant, entry: ConfigEntry) -> NissanAccount:
+    """Return the shared account for an entry, creating it on first use.
+
+    No request is made, the stored token is only validated locally. Pool sizes are taken from the options of the entry that creates the account.
+    """
+    registry = _registry(hass)
+    key = _account_key(entry)
+
+    async with registry.lock:
+        if account := registry.accounts.get(key):
+            account.storage.add(entry)
+            return account
+
+        storage = AccountTokenStorage(hass)
+        storage.add(entry)
+        session = ClientSession(
+            connector=TCPConnector(
+                limit=entry.options.get(CONF_POOL_SIZE, DEFAULT_POOL_SIZE),
+                limit_per_host=entry.options.get(
+                    CONF_POOL_SIZE_PER_HOST, DEFAULT_POOL_SIZE_PER_HOST
+                ),
+            ),
+        )
+        # the renewer keeps the token fresh, so requests only refresh expired
+        # tokens, and an already expired one is renewed right after start
+        auth = AsyncTokenAuth(session, token_storage=storage, refresh_margin=0)
+        renewer = TokenRenewer(auth, fraction=TOKEN_RENEW_FRACTION)
+        renewer.start()
+
+        account = registry.accounts[key] = NissanAccount(
+            session=session,
+            auth=auth,
+            renewer=renewer,
+            storage=storage,
+            rate_limiter=RateLimiter(),
+        )
+        return account
+
+
+async def async_release_account(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Detach an entry from its account, closing the account with its last entry."""
+    registry = _registry(hass)
+    key = _account_key(entry)
+
+    async with registry.lock:
+        if not (account := registry.accounts.get(key)):
+            return
+
+        account.storage.remove(entry)
+        if account.entry_ids:
+            return
+
+        del registry.accounts[key]
+        account.renewer.stop()
+        await account.session.close()
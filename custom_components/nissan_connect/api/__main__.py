@@ -1,11 +1,107 @@
-from argparse import ArgumentParser
+from argparse import ArgumentParser, FileType
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Any, Iterable, TextIO
+import json
 import logging
 import os
+import threading
+import time
 from pprint import pp
 
+from requests import Session
+
 from .auth import TokenAuth
+from .diff import diff
+from .error import MissingTokenError, TokenRefreshError
+from .token import FileTokenStorage
 from .vehicle import Vehicle
-from .schema import RemoteCommand, Service
+from .schema import RemoteCommand, Service, service_adapter
+
+def _default_token_cache(username: str) -> str:
+	cache = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+	return os.path.join(cache, 'nissan_connect', f'{username}.json')
+
+def _login(auth: TokenAuth, username: str, password: str | None) -> bool:
+	"""Reuse the cached token, refreshing it if needed, and log in only without one.
+
+	Returns False when a login is needed but no password was given.
+	"""
+	try:
+		auth.ensure_fresh()
+		return True
+	except (MissingTokenError, TokenRefreshError) as err:
+		logging.info(f'Cached token unusable, logging in: {err!r}')
+	if not password:
+		return False
+	auth.generate(username, password)
+	return True
+
+def _read_vins(file: TextIO) -> list[str]:
+	"""VINs one per line, blank lines and `#` comments are skipped."""
+	vins = (line.split('#', 1)[0].strip() for line in file)
+	return [vin for vin in vins if vin]
+
+def _emit(record: dict[str, Any]):
+	print(json.dumps(record, default=str), flush=True)
+
+def _fleet(auth: TokenAuth, vins: Iterable[str], service: Service, *, workers: int, pin: str = ''):
+	"""Query a service for many vehicles, streaming one NDJSON line per vehicle as it finishes."""
+	local = threading.local()
+
+	def query(vin: str) -> Any:
+		# one session per worker keeps its connection alive across vehicles
+		if not hasattr(local, 'session'):
+			local.session = Session()
+		return Vehicle(auth, vin, pin=pin, session=local.session).get_status(service)
+
+	with ThreadPoolExecutor(max_workers=workers) as executor:
+		futures = {executor.submit(query, vin): vin for vin in vins}
+		for future in as_completed(futures):
+			vin = futures[future]
+			try:
+				_emit({'vin': vin, 'service': service.name.lower(), 'response': future.result()})
+			except Exception as err:
+				_emit({'vin': vin, 'service': service.name.lower(), 'error': repr(err)})
+
+def _watch(auth: TokenAuth, vins: Iterable[str], service: Service, *, interval: float, workers: int, pin: str = ''):
+	"""Poll a service forever, printing one NDJSON line per changed field.
+
+	The first poll of a vehicle prints its whole response under an empty path.
+	Responses are only decoded and diffed when their bytes changed.
+	"""
+	adapter = service_adapter(service)
+	local = threading.local()
+	last: dict[str, tuple[bytes, Any]] = {}
+
+	def poll(vin: str) -> list[dict[str, Any]]:
+		if not hasattr(local, 'session'):
+			local.session = Session()
+		at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+		try:
+			raw = Vehicle(auth, vin, pin=pin, session=local.session).get_raw(service)
+		except Exception as err:
+			return [{'time': at, 'vin': vin, 'error': repr(err)}]
+		previous = last.get(vin)
+		if previous and previous[0] == raw:
+			return []
+		model = adapter.validate_json(raw)
+		last[vin] = (raw, model)
+		if not previous:
+			return [{'time': at, 'vin': vin, 'path': '', 'old': None, 'new': adapter.dump_python(model, mode='json')}]
+		return [
+			{'time': at, 'vin': vin, 'path': c.path, 'old': c.old, 'new': c.new}
+			for c in diff(previous[1], model)
+		]
+
+	vins = list(vins)
+	with ThreadPoolExecutor(max_workers=workers) as executor:
+		while True:
+			started = time.monotonic()
+			for records in executor.map(poll, vins):
+				for record in records:
+					_emit(record)
+			time.sleep(max(0, interval - (time.monotonic() - started)))
 
 def main():
 	LOGLEVEL = os.environ.get('LOGLEVEL', 'WARNING').upper()
@@ -13,8 +109,13 @@ def main():
 
 	parser = ArgumentParser(prog='NissanConnect')
 	parser.add_argument('-u', '--username', required=True)
-	parser.add_argument('-p', '--password', required=True)
-	parser.add_argument('-v', '--vin', required=True)
+	parser.add_argument('-p', '--password', help='Needed when there is no usable cached token')
+	parser.add_argument('-t', '--token-cache', metavar='FILE', help='Token cache shared by runs, defaults to the user cache directory')
+	vehicles = parser.add_mutually_exclusive_group(required=True)
+	vehicles.add_argument('-v', '--vin')
+	vehicles.add_argument('-f', '--fleet', type=FileType('r'), metavar='FILE', help='Query every VIN in FILE, one per line, - for stdin')
+	parser.add_argument('-w', '--workers', type=int, default=8, help='Concurrent requests in fleet mode')
+	parser.add_argument('-W', '--watch', type=float, metavar='SECONDS', help='Poll every SECONDS and print changed fields only')
 
 	service_parsers = parser.add_subparsers(title='service', dest='service', help='The remote service')
 	service_parsers.required = True
@@ -27,9 +128,31 @@ def main():
 			sub_parser.add_argument('command', nargs='?', default=None, choices=choices, help='The command to send')
 
 	args = parser.parse_args()
+	if (args.fleet or args.watch) and getattr(args, 'command', None):
+		parser.error('commands cannot be sent in fleet or watch mode')
+
+	auth = TokenAuth(token_storage=FileTokenStorage(
+		args.token_cache or _default_token_cache(args.username)
+	))
+	if not _login(auth, args.username, args.password):
+		parser.error('no usable cached token, a password is required')
+
+	if args.watch:
+		try:
+			_watch(
+				auth, _read_vins(args.fleet) if args.fleet else [args.vin], Service[args.service.upper()],
+				interval=args.watch, workers=args.workers, pin=args.pin,
+			)
+		except KeyboardInterrupt:
+			pass
+		return
 
-	auth = TokenAuth()
-	auth.generate(args.username, args.password)
+	if args.fleet:
+		_fleet(
+			auth, _read_vins(args.fleet), Service[args.service.upper()],
+			workers=args.workers, pin=args.pin,
+		)
+		return
 
 	vehicle = Vehicle(auth, args.vin, pin=args.pin)
 	if getattr(args, 'command', None):
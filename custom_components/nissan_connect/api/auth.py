@@ -1,5 +1,13 @@
-from time import time
+from concurrent.futures import Future
+from contextlib import nullcontext
+from time import perf_counter, time
+from typing import Callable
+import asyncio
+import logging
+import random
+import threading
 
+from aiohttp import ClientResponseError, ClientSession
 from requests import (
 	Session,
 	PreparedRequest,
@@ -17,26 +25,48 @@ from .error import (
 	TokenAuthError,
 	TokenRefreshError,
 )
+from .metrics import Metrics
 from .token import (
 	Token,
 	TokenStorage,
 	SimpleTokenStorage,
 )
 
+_LOGGER = logging.getLogger(__name__)
+
+# refresh tokens on the request path if they will or have expired
+# in less than 10 minutes
+DEFAULT_REFRESH_MARGIN = 600
+
 
 class CVAuth(AuthBase):
 	def __init__(self, tenant_id: str, app_id: str) -> None:
 		self.tenant_id = tenant_id
 		self.app_id = app_id
 
-	def __call__(self, r: PreparedRequest):
-		r.headers.update({
+	@property
+	def headers(self) -> dict[str, str]:
+		return {
 			'CV-Tenant-Id': self.tenant_id,
 			'CV-APPID': self.app_id,
-		})
+		}
+
+	def __call__(self, r: PreparedRequest):
+		r.headers.update(self.headers)
 		return r
 
 
+def _token_headers(token: Token) -> dict[str, str]:
+	return {
+		'Authorization': f'Bearer {token.access_token}',
+		'id_token': token.id_token,
+	}
+
+
+def _needs_refresh(token: Token, margin: int = DEFAULT_REFRESH_MARGIN) -> bool:
+	return token.expires_at - int(time()) < margin
+
+
 class TokenAuth(AuthBase):
 	def __init__(
 		self, *,
@@ -44,12 +74,16 @@ class TokenAuth(AuthBase):
 		app_id: str=NISSAN_CONNECT_APP_ID,
 		token_url: str=NISSAN_TOKEN_URL,
 		token_storage: TokenStorage | None = None,
+		metrics: Metrics | None = None,
 	):
 		self._cv_auth = CVAuth(tenant_id, app_id)
+		self.metrics = metrics
 		self._session = Session()
 		self._session.auth = self._cv_auth
 		self._token_url = token_url
 		self._token_storage = token_storage or SimpleTokenStorage()
+		self._refresh_lock = threading.Lock()
+		self._inflight_refresh: Future[None] | None = None
 
 	@property
 	def token(self) -> Token:
@@ -60,18 +94,27 @@ class TokenAuth(AuthBase):
 		self._token_storage.set(token)
 
 	def _post(self, credentials: dict[str, str]):
+		start = perf_counter() if self.metrics else 0
+		ok = False
 		try:
 			r = self._session.post(self._token_url, json=credentials)
 			r.raise_for_status()
+			ok = True
+			# a malformed body is a failed refresh like any other
+			token = Token.from_dict(r.json())
 		except HTTPError as err:
-			if 400 <= err.response.status_code < 500:
+			# a throttled refresh says nothing about the credentials
+			if 400 <= err.response.status_code < 500 and err.response.status_code != 429:
 				raise TokenAuthError(err) from err
 			else:
 				raise TokenApiError(err) from err
 		except Exception as err:
 			raise TokenRefreshError(err) from err
+		finally:
+			if self.metrics:
+				self.metrics.observe('token', perf_counter() - start, error=not ok)
 
-		self._token_storage.set(Token.from_dict(r.json()))
+		self._token_storage.set(token)
 
 	def generate(self, username: str, password: str):
 		self._post({
@@ -84,17 +127,203 @@ class TokenAuth(AuthBase):
 			'refresh_token': self._token_storage.get().nna_refresh_token,
 		})
 
-	def __call__(self, r: PreparedRequest):
+	def _refresh_single_flight(self):
+		"""Refresh the token, sharing one in-flight refresh among concurrent callers."""
+		with self._refresh_lock:
+			inflight = self._inflight_refresh
+			if inflight is None:
+				# a refresh may have completed since the caller read the token
+				if not _needs_refresh(self._token_storage.get()):
+					return
+				inflight = self._inflight_refresh = Future()
+				leader = True
+			else:
+				leader = False
+
+		if not leader:
+			return inflight.result()
+
+		try:
+			# storages shared between processes are locked so only one of them refreshes
+			with getattr(self._token_storage, 'lock', nullcontext)():
+				if _needs_refresh(self._token_storage.get()):
+					self.refresh()
+		except BaseException as err:
+			inflight.set_exception(err)
+			raise
+		else:
+			inflight.set_result(None)
+		finally:
+			with self._refresh_lock:
+				self._inflight_refresh = None
+
+	def ensure_fresh(self) -> Token:
+		"""Return the token, refreshing it first if it expires soon."""
 		token = self._token_storage.get()
 
-		# refresh_tokens if the token will or has expired
-		# in less than 10 minutes
-		if token.expires_at - int(time()) < 600:
-			self.refresh()
+		if _needs_refresh(token):
+			self._refresh_single_flight()
+			token = self._token_storage.get()
+
+		return token
 
+	def __call__(self, r: PreparedRequest):
+		token = self.ensure_fresh()
 		r = self._cv_auth(r)
-		r.headers.update({
-			'Authorization': f'Bearer {token.access_token}',
-			'id_token': token.id_token,
-		})
+		r.headers.update(_token_headers(token))
 		return r
+
+
+class AsyncTokenAuth():
+	def __init__(
+		self, session: ClientSession, *,
+		tenant_id: str=NISSAN_TENANT_ID,
+		app_id: str=NISSAN_CONNECT_APP_ID,
+		token_url: str=NISSAN_TOKEN_URL,
+		token_storage: TokenStorage | None = None,
+		refresh_margin: int = DEFAULT_REFRESH_MARGIN,
+		metrics: Metrics | None = None,
+	):
+		self._cv_auth = CVAuth(tenant_id, app_id)
+		self.metrics = metrics
+		self.session = session
+		self.refresh_margin = refresh_margin
+		self._token_url = token_url
+		self._token_storage = token_storage or SimpleTokenStorage()
+		self._inflight_refresh: asyncio.Future[None] | None = None
+
+	@property
+	def token(self) -> Token:
+		return self._token_storage.get()
+
+	@token.setter
+	def token(self, token: Token):
+		self._token_storage.set(token)
+
+	async def _post(self, credentials: dict[str, str]):
+		start = perf_counter() if self.metrics else 0
+		ok = False
+		try:
+			async with self.session.post(
+				self._token_url, json=credentials, headers=self._cv_auth.headers,
+				raise_for_status=True,
+			) as r:
+				data = await r.json(content_type=None)
+			ok = True
+			# a malformed body is a failed refresh like any other
+			token = Token.from_dict(data)
+		except ClientResponseError as err:
+			if 400 <= err.status < 500 and err.status != 429:
+				raise TokenAuthError(err) from err
+			else:
+				raise TokenApiError(err) from err
+		except Exception as err:
+			raise TokenRefreshError(err) from err
+		finally:
+			if self.metrics:
+				self.metrics.observe('token', perf_counter() - start, error=not ok)
+
+		self._token_storage.set(token)
+
+	async def generate(self, username: str, password: str):
+		await self._post({
+			'email': username,
+			'password': password,
+		})
+
+	async def refresh(self):
+		await self._post({
+			'refresh_token': self._token_storage.get().nna_refresh_token,
+		})
+
+	async def _refresh_single_flight(self, is_stale: Callable[[Token], bool] | None = None):
+		"""Refresh the token, sharing one in-flight refresh among concurrent callers."""
+		is_stale = is_stale or self._needs_refresh
+		inflight = self._inflight_refresh
+		if inflight is None:
+			# a refresh may have completed since the caller read the token
+			if not is_stale(self._token_storage.get()):
+				return
+			inflight = self._inflight_refresh = asyncio.ensure_future(self.refresh())
+			inflight.add_done_callback(self._clear_inflight_refresh)
+
+		# shield so a cancelled caller does not cancel the refresh for the others
+		await asyncio.shield(inflight)
+
+	def _clear_inflight_refresh(self, inflight: asyncio.Future[None]):
+		if self._inflight_refresh is inflight:
+			self._inflight_refresh = None
+
+	def _needs_refresh(self, token: Token) -> bool:
+		return _needs_refresh(token, self.refresh_margin)
+
+	async def headers(self) -> dict[str, str]:
+		token = self._token_storage.get()
+
+		if self._needs_refresh(token):
+			await self._refresh_single_flight()
+			token = self._token_storage.get()
+
+		return self._cv_auth.headers | _token_headers(token)
+
+
+class TokenRenewer():
+	"""Renew the token of an AsyncTokenAuth in the background.
+
+	The token is refreshed once `fraction` of its lifetime has elapsed. Failed
+	renewals are retried with jittered exponential backoff until the token is
+	renewed, so requests only refresh inline once the token has actually expired
+	when the auth is created with `refresh_margin=0`. A rejected refresh token
+	stops the renewal, it is left to the request path to trigger a reauth.
+	"""
+	def __init__(
+		self,
+		auth: AsyncTokenAuth,
+		*,
+		fraction: float = 0.8,
+		retry_min: float = 30,
+		retry_max: float = 600,
+	):
+		self._auth = auth
+		self._fraction = fraction
+		self._retry_min = retry_min
+		self._retry_max = retry_max
+		self._task: asyncio.Task[None] | None = None
+
+	def renew_at(self, token: Token) -> float:
+		return token.issued_at + token.lifetime * self._fraction
+
+	def _is_due(self, token: Token) -> bool:
+		return time() >= self.renew_at(token)
+
+	def start(self):
+		if self._task is None:
+			self._task = asyncio.get_running_loop().create_task(self._run())
+
+	def stop(self):
+		if self._task is not None:
+			self._task.cancel()
+			self._task = None
+
+	async def _run(self):
+		failures = 0
+		while True:
+			delay = self.renew_at(self._auth.token) - time()
+			if delay > 0:
+				await asyncio.sleep(delay)
+
+			try:
+				await self._auth._refresh_single_flight(self._is_due)
+			except TokenAuthError as err:
+				# retrying a rejected refresh token is pointless, requests trigger the reauth
+				_LOGGER.warning(f'Token renewal rejected, stopping background renewal: {err}')
+				self._task = None
+				return
+			except TokenRefreshError as err:
+				failures += 1
+				backoff = min(self._retry_max, self._retry_min * 2 ** (failures - 1))
+				backoff *= random.uniform(0.5, 1)
+				_LOGGER.warning(f'Token renewal failed, retrying in {backoff:.0f}s: {err}')
+				await asyncio.sleep(backoff)
+			else:
+				failures = 0
@@ -0,0 +1,57 @@
+from enum import StrEnum
+from time import monotonic
+
+
+class CircuitState(StrEnum):
+	CLOSED = 'closed'
+	OPEN = 'open'
+	HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker():
+	"""Stop calling an endpoint that keeps failing.
+
+	After `threshold` consecutive failures the circuit opens and calls are
+	refused for `cooldown` seconds. The first call after that is a probe: its
+	success closes the circuit, its failure opens it again for twice as long,
+	up to `max_cooldown`.
+	"""
+	def __init__(self, threshold: int = 3, cooldown: float = 60, max_cooldown: float = 3600) -> None:
+		self.threshold = threshold
+		self.min_cooldown = cooldown
+		self.max_cooldown = max_cooldown
+		self.state = CircuitState.CLOSED
+		self.failures = 0
+		self.cooldown = cooldown
+		self.opened_until = 0.0
+
+	def allow(self) -> bool:
+		if self.state == CircuitState.CLOSED:
+			return True
+		if self.state == CircuitState.OPEN and monotonic() >= self.opened_until:
+			# let a single probe through
+			self.state = CircuitState.HALF_OPEN
+			return True
+		return False
+
+	def retry_in(self) -> float:
+		return max(0, self.opened_until - monotonic())
+
+	def record_success(self):
+		self.state = CircuitState.CLOSED
+		self.failures = 0
+		self.cooldown = self.min_cooldown
+
+	def abandon(self):
+		"""Give up a call without an outcome, e.g. a cancelled probe."""
+		if self.state == CircuitState.HALF_OPEN:
+			self.state = CircuitState.OPEN
+
+	def record_failure(self):
+		self.failures += 1
+		if self.state == CircuitState.HALF_OPEN:
+			self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+		elif self.failures < self.threshold:
+			return
+		self.state = CircuitState.OPEN
+		self.opened_until = monotonic() + self.cooldown
@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, Mapping
+
+from .schema import Service
+
+
+# telemetry that reflects the outcome of a command on a service
+_dependent_services: dict[Service, tuple[Service, ...]] = {
+	Service.DOOR: (Service.VEHICLE_STATUS, Service.SERVICE_HISTORY),
+	Service.ENGINE: (Service.VEHICLE_STATUS, Service.SERVICE_HISTORY),
+	Service.HORN_AND_LIGHTS: (Service.SERVICE_HISTORY,),
+}
+
+
+@dataclass
+class CacheEntry():
+	body: Any
+	fetched_at: float
+	etag: str | None = None
+	last_modified: str | None = None
+
+
+class ResponseCache():
+	"""Per-service cache of status responses.
+
+	Entries younger than `ttl` seconds are served without a request. Older
+	entries are revalidated with `If-None-Match`/`If-Modified-Since` when the
+	server sent validators, so an unchanged payload costs a 304.
+	"""
+	def __init__(self, ttl: float = 0) -> None:
+		self.ttl = ttl
+		self.hits = 0
+		self.misses = 0
+		self.revalidations = 0
+		self._entries: dict[Service, CacheEntry] = {}
+
+	def lookup(self, service: Service) -> CacheEntry | None:
+		entry = self._entries.get(service)
+		if entry and monotonic() - entry.fetched_at < self.ttl:
+			self.hits += 1
+			return entry
+		self.misses += 1
+		return None
+
+	def conditional_headers(self, service: Service) -> dict[str, str]:
+		headers = {}
+		if entry := self._entries.get(service):
+			if entry.etag:
+				headers['If-None-Match'] = entry.etag
+			if entry.last_modified:
+				headers['If-Modified-Since'] = entry.last_modified
+		return headers
+
+	def revalidate(self, service: Service) -> CacheEntry | None:
+		"""Mark a cached entry as confirmed by a 304 response."""
+		if entry := self._entries.get(service):
+			entry.fetched_at = monotonic()
+			self.revalidations += 1
+		return entry
+
+	def store(self, service: Service, body: Any, headers: Mapping[str, str]):
+		self._entries[service] = CacheEntry(
+			body=body,
+			fetched_at=monotonic(),
+			etag=headers.get('ETag'),
+			last_modified=headers.get('Last-Modified'),
+		)
+
+	def invalidate(self, service: Service):
+		"""Drop a service and the telemetry that depends on it."""
+		for s in (service, *_dependent_services.get(service, ())):
+			self._entries.pop(s, None)
+
+	def clear(self):
+		self._entries.clear()
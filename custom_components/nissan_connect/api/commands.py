@@ -0,0 +1,123 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+import asyncio
+import logging
+
+from .error import CommandSupersededError
+from .schema import RemoteCommand, RequestStatus, Service
+
+CommandRunner = Callable[[RemoteCommand], Awaitable[RequestStatus]]
+_LOGGER = logging.getLogger(__name__)
+
+# queued commands a newer command makes pointless
+_superseded_commands_map: dict[RemoteCommand, tuple[RemoteCommand, ...]] = {
+	RemoteCommand.LOCK: (RemoteCommand.UNLOCK,),
+	RemoteCommand.UNLOCK: (RemoteCommand.LOCK,),
+	RemoteCommand.START: (RemoteCommand.STOP,),
+	RemoteCommand.DOUBLE_START: (RemoteCommand.STOP,),
+	RemoteCommand.STOP: (RemoteCommand.START, RemoteCommand.DOUBLE_START),
+}
+
+
+@dataclass
+class PendingCommand():
+	command: RemoteCommand
+	future: asyncio.Future[RequestStatus]
+	waiters: int = 0
+	task: asyncio.Task[RequestStatus] | None = None
+
+
+class CommandQueue():
+	"""Run the remote commands of one vehicle, one at a time per service.
+
+	A command identical to the last pending one of its service shares that
+	command's result instead of being sent again. A command removes the queued,
+	not yet sent, commands it supersedes, e.g. UNLOCK drops a queued LOCK, and
+	those fail with CommandSupersededError. Commands already sent always finish
+	unless every caller waiting for them was cancelled: a queued command is then
+	dropped and a running one stops being followed, since a command reaching
+	the vehicle cannot be recalled.
+	"""
+	def __init__(self, run: CommandRunner) -> None:
+		self._run = run
+		self._running: dict[Service, PendingCommand] = {}
+		self._queued: dict[Service, deque[PendingCommand]] = {}
+		self._workers: dict[Service, asyncio.Task[None]] = {}
+
+	def pending(self, service: Service) -> list[RemoteCommand]:
+		"""Commands of a service that did not finish yet, running one first."""
+		running = self._running.get(service)
+		return [p.command for p in (running, *self._queued.get(service, ())) if p]
+
+	async def submit(self, command: RemoteCommand) -> RequestStatus:
+		service = command.service
+		queued = self._queued.setdefault(service, deque())
+
+		if superseded := _superseded_commands_map.get(command):
+			for pending in [p for p in queued if p.command in superseded]:
+				queued.remove(pending)
+				pending.future.set_exception(CommandSupersededError(pending.command, command))
+				_LOGGER.debug(f'{pending.command.name} superseded by {command.name}')
+
+		tail = queued[-1] if queued else self._running.get(service)
+		if tail and tail.command == command:
+			_LOGGER.debug(f'{command.name} coalesced with a pending {command.name}')
+			return await self._wait(tail)
+
+		pending = PendingCommand(command, asyncio.get_running_loop().create_future())
+		# waiters may be cancelled, the outcome must not be reported as unretrieved
+		pending.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+		queued.append(pending)
+		if service not in self._workers:
+			self._workers[service] = asyncio.create_task(self._drain(service))
+		return await self._wait(pending)
+
+	async def _wait(self, pending: PendingCommand) -> RequestStatus:
+		pending.waiters += 1
+		try:
+			# one cancelled caller must not cancel the command for the others
+			return await asyncio.shield(pending.future)
+		finally:
+			pending.waiters -= 1
+			if not pending.waiters and not pending.future.done():
+				self._abandon(pending)
+
+	def _abandon(self, pending: PendingCommand):
+		"""Drop a command nobody waits for anymore."""
+		queued = self._queued.get(pending.command.service, ())
+		if pending in queued:
+			queued.remove(pending)
+			pending.future.cancel()
+		elif pending.task:
+			pending.task.cancel()
+		_LOGGER.debug(f'{pending.command.name} abandoned by its callers')
+
+	async def _drain(self, service: Service):
+		queued = self._queued[service]
+		try:
+			while queued:
+				pending = self._running[service] = queued.popleft()
+				pending.task = asyncio.create_task(self._run(pending.command))
+				try:
+					pending.future.set_result(await pending.task)
+				except asyncio.CancelledError:
+					pending.future.cancel()
+					# an abandoned command only ends itself, a closed queue ends the worker
+					if asyncio.current_task().cancelling():
+						raise
+				except Exception as err:
+					pending.future.set_exception(err)
+				finally:
+					del self._running[service]
+		finally:
+			del self._workers[service]
+
+	def close(self):
+		"""Cancel every running and queued command."""
+		for worker in self._workers.values():
+			worker.cancel()
+		for queued in self._queued.values():
+			for pending in queued:
+				pending.future.cancel()
+			queued.clear()
@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+from typing import Any, Iterator
+import re
+
+from pydantic import BaseModel
+
+
+@dataclass(frozen=True, slots=True)
+class Change():
+	path: str
+	old: Any
+	new: Any
+
+
+# one step of a path, `[3]` or a name
+_STEP = re.compile(r'\[(\d+)\]|([^.\[]+)')
+
+
+def _join(path: str, key: str) -> str:
+	return f'{path}.{key}' if path else key
+
+
+def _plain(value: Any) -> Any:
+	"""A JSON friendly copy of a value that was added or removed as a whole."""
+	if isinstance(value, BaseModel):
+		return value.model_dump(mode='json')
+	if isinstance(value, list):
+		return [_plain(v) for v in value]
+	if isinstance(value, dict):
+		return {k: _plain(v) for k, v in value.items()}
+	return value
+
+
+def diff(old: Any, new: Any, path: str = '') -> Iterator[Change]:
+	"""Changed leaves between two values of the api.schema models.
+
+	Models of the same type are compared field by field, lists by index and
+	dicts by key, yielding a Change for each differing leaf with a dotted path
+	like `lockStatus.doorStatusFrontLeft` or `[3].status`. Identical objects
+	are skipped without being visited, and only subtrees that were added,
+	removed or changed type are serialized.
+	"""
+	if old is new:
+		return
+	if isinstance(old, BaseModel) and type(old) is type(new):
+		for name in type(old).model_fields:
+			yield from diff(getattr(old, name), getattr(new, name), _join(path, name))
+	elif isinstance(old, list) and isinstance(new, list):
+		for i in range(max(len(old), len(new))):
+			item_path = f'{path}[{i}]'
+			if i >= len(old):
+				yield Change(item_path, None, _plain(new[i]))
+			elif i >= len(new):
+				yield Change(item_path, _plain(old[i]), None)
+			else:
+				yield from diff(old[i], new[i], item_path)
+	elif isinstance(old, dict) and isinstance(new, dict):
+		for key in dict.fromkeys([*old, *new]):
+			yield from diff(old.get(key), new.get(key), _join(path, str(key)))
+	elif old != new or type(old) is not type(new):
+		yield Change(path, _plain(old), _plain(new))
+
+
+def parents(path: str) -> Iterator[str]:
+	"""The path and the paths containing it, shortest first: `a`, `a.b`, `a.b[0]`."""
+	for step in _STEP.finditer(path):
+		yield path[:step.end()]
+
+
+def resolve(value: Any, path: str) -> Any:
+	"""The value at a path of a Change, None when a step is missing."""
+	for index, name in _STEP.findall(path):
+		if value is None:
+			return None
+		if name:
+			value = value.get(name) if isinstance(value, dict) else getattr(value, name, None)
+		else:
+			value = value[int(index)] if int(index) < len(value) else None
+	return value
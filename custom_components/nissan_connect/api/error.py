@@ -9,3 +9,24 @@ class TokenAuthError(TokenRefreshError):
 
 class TokenApiError(TokenRefreshError):
 	pass
+
+class RequestTimeoutError(Exception):
+	pass
+
+class CommandSupersededError(Exception):
+	pass
+
+class ApiError(Exception):
+	def __init__(self, message: str, status: int) -> None:
+		super().__init__(message)
+		self.status = status
+
+class RateLimitedError(ApiError):
+	def __init__(self, message: str, retry_after: float) -> None:
+		super().__init__(message, 429)
+		self.retry_after = retry_after
+
+class CircuitOpenError(Exception):
+	def __init__(self, message: str, retry_in: float) -> None:
+		super().__init__(message)
+		self.retry_in = retry_in
@@ -0,0 +1,91 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+# upper bounds of the latency buckets in milliseconds
+LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+# upper bounds of the polls per command buckets
+POLL_BUCKETS = (1, 2, 3, 5, 8, 13, 21, float('inf'))
+
+
+@dataclass
+class Histogram():
+	bounds: tuple[float, ...] = LATENCY_BUCKETS
+	counts: list[int] = field(default_factory=list)
+	count: int = 0
+	total: float = 0
+
+	def __post_init__(self):
+		self.counts = self.counts or [0] * len(self.bounds)
+
+	def observe(self, value: float):
+		for i, bound in enumerate(self.bounds):
+			if value <= bound:
+				self.counts[i] += 1
+				break
+		self.count += 1
+		self.total += value
+
+	@property
+	def mean(self) -> float | None:
+		return self.total / self.count if self.count else None
+
+	def quantile(self, q: float) -> float | None:
+		"""Upper bound of the bucket holding the q-th quantile."""
+		if not self.count:
+			return None
+		rank = q * self.count
+		seen = 0
+		for bound, n in zip(self.bounds, self.counts):
+			seen += n
+			if seen >= rank:
+				return bound
+		return self.bounds[-1]
+
+	def to_dict(self) -> dict[str, Any]:
+		return {
+			'count': self.count,
+			'mean': self.mean,
+			'p95': self.quantile(0.95),
+			'buckets': {str(b): n for b, n in zip(self.bounds, self.counts)},
+		}
+
+
+class Metrics():
+	"""Request latency and error counters.
+
+	Objects in the api package take an optional `metrics` and skip all
+	timing when it is None, so instrumentation costs nothing when disabled.
+	"""
+	def __init__(self) -> None:
+		self.latency: dict[str, Histogram] = {}
+		self.requests: dict[str, int] = {}
+		self.errors: dict[str, int] = {}
+		self.polls = Histogram(POLL_BUCKETS)
+
+	def observe(self, key: str, seconds: float, *, error: bool = False):
+		self.latency.setdefault(key, Histogram()).observe(seconds * 1000)
+		self.requests[key] = self.requests.get(key, 0) + 1
+		if error:
+			self.errors[key] = self.errors.get(key, 0) + 1
+
+	def observe_polls(self, polls: int):
+		self.polls.observe(polls)
+
+	def summary(self) -> dict[str, float | int | None]:
+		"""Flat values suitable for sensors."""
+		summary: dict[str, float | int | None] = {
+			'requests': sum(self.requests.values()),
+			'errors': sum(self.errors.values()),
+			'polls_per_command': self.polls.mean,
+		}
+		for key, histogram in self.latency.items():
+			summary[f'latency_{key}'] = histogram.mean
+		return summary
+
+	def to_dict(self) -> dict[str, Any]:
+		return {
+			'requests': dict(self.requests),
+			'errors': dict(self.errors),
+			'latency_ms': {k: h.to_dict() for k, h in self.latency.items()},
+			'polls_per_command': self.polls.to_dict(),
+		}
@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import monotonic
+import asyncio
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# seconds to back off when a 429 carries no usable Retry-After
+DEFAULT_RETRY_AFTER = 30
+
+
+def parse_retry_after(value: str | None, default: float = DEFAULT_RETRY_AFTER) -> float:
+	"""Seconds to wait from a Retry-After header, given as seconds or an HTTP date."""
+	if not value:
+		return default
+	try:
+		return max(0, float(value))
+	except ValueError:
+		pass
+	try:
+		when = parsedate_to_datetime(value)
+	except (TypeError, ValueError):
+		return default
+	if when.tzinfo is None:
+		when = when.replace(tzinfo=timezone.utc)
+	return max(0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimiter():
+	"""Token bucket shared by every vehicle of an account.
+
+	The bucket holds up to `burst` requests and refills at `rate` per second.
+	Background requests leave `reserve` requests in the bucket, which only
+	priority requests, i.e. remote commands and their status polls, may use.
+	A throttled response pauses every request until its Retry-After passed.
+	"""
+	def __init__(self, rate: float = 3, burst: int = 20, *, reserve: int = 4) -> None:
+		self.rate = rate
+		self.burst = burst
+		self.reserve = min(reserve, burst - 1)
+		self.throttled = 0
+		self._tokens = float(burst)
+		self._updated_at = monotonic()
+		self._paused_until = 0.0
+
+	def _refill(self, now: float):
+		self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+		self._updated_at = now
+
+	async def acquire(self, *, priority: bool = False):
+		needed = 1 if priority else self.reserve + 1
+		while True:
+			now = monotonic()
+			if now < self._paused_until:
+				await asyncio.sleep(self._paused_until - now)
+				continue
+			self._refill(now)
+			if self._tokens >= needed:
+				self._tokens -= 1
+				return
+			await asyncio.sleep((needed - self._tokens) / self.rate)
+
+	def throttle(self, retry_after: float):
+		"""Pause all requests for `retry_after` seconds and drain the bucket."""
+		self.throttled += 1
+		now = monotonic()
+		self._paused_until = max(self._paused_until, now + retry_after)
+		self._tokens = 0
+		self._updated_at = max(now, self._paused_until)
+		_LOGGER.warning(f'Throttled by the API, pausing requests for {retry_after:.0f}s')
@@ -2,7 +2,7 @@ from enum import StrEnum
 from datetime import datetime
 from typing import Any, Self
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 
 class SymmetricEnum(StrEnum):
@@ -85,11 +85,11 @@ class ServiceType(SymmetricEnum):
 
 	@property
 	def service(self) -> Service | None:
-		return _service_type_service_map[self][0]
+		return _service_type_service_map.get(self, (None, None))[0]
 
 	@property
 	def command(self) -> RemoteCommand | None:
-		return _service_type_service_map[self][1]
+		return _service_type_service_map.get(self, (None, None))[1]
 
 _service_type_service_map: dict[ServiceType, tuple[Service, RemoteCommand | None]] = {
 	ServiceType.REMOTE_DOOR_LOCK: (Service.DOOR, RemoteCommand.LOCK),
@@ -185,3 +185,23 @@ class RequestStatus(BaseSchema):
 	activationDateTime: datetime | None = None
 	statusChangeDateTime: datetime | None = None
 	command: RemoteCommand | None = None
+
+
+# adapters are built once, building them per call costs more than validating
+vehicle_status_adapter = TypeAdapter(VehicleStatus)
+location_status_adapter = TypeAdapter(LocationStatus)
+request_status_adapter = TypeAdapter(RequestStatus)
+service_history_adapter = TypeAdapter(list[RequestStatus])
+
+_service_adapter_map: dict[Service, TypeAdapter] = {
+	Service.DOOR: request_status_adapter,
+	Service.ENGINE: request_status_adapter,
+	Service.HORN_AND_LIGHTS: request_status_adapter,
+	Service.SERVICE_HISTORY: service_history_adapter,
+	Service.LOCATION: location_status_adapter,
+	Service.VEHICLE_STATUS: vehicle_status_adapter,
+}
+
+def service_adapter(service: Service) -> TypeAdapter:
+	"""The adapter that decodes responses of a service."""
+	return _service_adapter_map[service]
@@ -0,0 +1,104 @@
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from typing import Any
+import json
+
+from .schema import RemoteCommand, RequestStatus, request_status_adapter
+
+_EPOCH = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _activated_at(status: RequestStatus) -> datetime:
+	return status.activationDateTime or _EPOCH
+
+
+def _command(status: RequestStatus) -> RemoteCommand | None:
+	return status.command or status.serviceType.command
+
+
+class ServiceHistory():
+	"""Incrementally synced remote service history of a vehicle.
+
+	Entries are indexed by `serviceRequestId` and kept in a log ordered by
+	activation time, bounded to `max_entries`. A sync only validates entries
+	that are new or whose status changed, and an unchanged response is not
+	even parsed. The ids of the last `max_evicted` entries dropped from the
+	log are remembered, so a response longer than the log does not bring
+	them back as new.
+	"""
+	def __init__(self, max_entries: int = 100, max_evicted: int = 1000) -> None:
+		self.max_entries = max_entries
+		self.max_evicted = max_evicted
+		self.by_id: dict[str, RequestStatus] = {}
+		self.log: list[RequestStatus] = []
+		self._latest: dict[RemoteCommand, RequestStatus] = {}
+		self._raw: bytes | None = None
+		# used as an ordered set, oldest eviction first
+		self._evicted: dict[str, None] = {}
+		# bumped by every sync that changed an entry
+		self.version = 0
+
+	def __len__(self) -> int:
+		return len(self.log)
+
+	def latest(self, command: RemoteCommand) -> RequestStatus | None:
+		"""The most recently activated request of a command."""
+		return self._latest.get(command)
+
+	def recent(self, n: int) -> list[RequestStatus]:
+		"""The last n entries, newest first."""
+		return self.log[:-n - 1:-1]
+
+	def sync(self, raw: bytes) -> list[RequestStatus]:
+		"""Merge a service history response, returns the new and changed entries."""
+		if raw == self._raw:
+			return []
+
+		# validate everything first, a bad response must not be merged halfway
+		updates: list[tuple[RequestStatus, RequestStatus | None]] = []
+		for item in json.loads(raw):
+			request_id = item.get('serviceRequestId')
+			if request_id in self._evicted:
+				continue
+			known = self.by_id.get(request_id)
+			if known and not self._differs(known, item):
+				continue
+			updates.append((request_status_adapter.validate_python(item), known))
+
+		changed = []
+		for status, known in updates:
+			self._put(status, known)
+			changed.append(status)
+		self._raw = raw
+
+		while len(self.log) > self.max_entries:
+			evicted = self.log.pop(0)
+			del self.by_id[evicted.serviceRequestId]
+			self._evicted[evicted.serviceRequestId] = None
+		while len(self._evicted) > self.max_evicted:
+			del self._evicted[next(iter(self._evicted))]
+		# entries dropped by this sync were never seen
+		changed = [status for status in changed if status.serviceRequestId in self.by_id]
+		if changed:
+			self.version += 1
+		return sorted(changed, key=_activated_at)
+
+	@staticmethod
+	def _differs(known: RequestStatus, item: dict[str, Any]) -> bool:
+		return item.get('status') != known.status.value or (
+			item.get('statusChangeDateTime') is not None and known.statusChangeDateTime is None
+		)
+
+	def _put(self, status: RequestStatus, known: RequestStatus | None):
+		if known:
+			# models compare by value, find the entry by identity from its slot
+			i = bisect_left(self.log, _activated_at(known), key=_activated_at)
+			while self.log[i] is not known:
+				i += 1
+			del self.log[i]
+		insort(self.log, status, key=_activated_at)
+		self.by_id[status.serviceRequestId] = status
+		if (command := _command(status)) is not None:
+			latest = self._latest.get(command)
+			if latest is None or latest is known or _activated_at(status) >= _activated_at(latest):
+				self._latest[command] = status
@@ -1,6 +1,16 @@
+from contextlib import contextmanager
 from dataclasses import dataclass
 from time import time
-from typing import Any, Protocol, Self
+from typing import Any, Iterator, Protocol, Self
+import json
+import os
+import tempfile
+import threading
+
+try:
+	import fcntl
+except ImportError:  # not available on Windows, writes stay atomic but unlocked
+	fcntl = None
 
 from .error import MissingTokenError
 
@@ -11,22 +21,30 @@ class Token():
 	access_token: str
 	id_token: str
 	expires_at: int
+	issued_at: int = 0
 
 	@classmethod
 	def from_dict(cls, d: dict[str, Any]) -> Self:
+		now = int(time())
 		return cls(
 			nna_refresh_token=str(d['nna_refresh_token']),
 			access_token=str(d['access_token']),
 			id_token=str(d['id_token']),
-			expires_at=d.get('expires_at') or int(time()) + int(d['expires_in']),
+			expires_at=d.get('expires_at') or now + int(d['expires_in']),
+			issued_at=d.get('issued_at') or now,
 		)
 
+	@property
+	def lifetime(self) -> int:
+		return self.expires_at - self.issued_at
+
 	def to_dict(self) -> dict[str, Any]:
 		return {
 			'nna_refresh_token': self.nna_refresh_token,
 			'access_token': self.access_token,
 			'id_token': self.id_token,
 			'expires_at': self.expires_at,
+			'issued_at': self.issued_at,
 		}
 
 
@@ -46,3 +64,63 @@ class SimpleTokenStorage():
 
 	def set(self, token: Token):
 		self._token = token
+
+
+class FileTokenStorage():
+	"""Token storage in a JSON file shared by concurrent processes.
+
+	Writes go to a temporary file that atomically replaces the token file, so
+	readers never need a lock. `lock()` holds an exclusive lock on a sibling
+	`.lock` file, which TokenAuth takes around a refresh so that only one
+	process refreshes and the others pick up its token.
+	"""
+	def __init__(self, path: str | os.PathLike) -> None:
+		self.path = os.fspath(path)
+		self._mutex = threading.RLock()
+		self._depth = 0
+		self._lock_fd = -1
+		self._cached: tuple[int, Token] | None = None
+
+	def get(self) -> Token:
+		try:
+			mtime = os.stat(self.path).st_mtime_ns
+			if self._cached and self._cached[0] == mtime:
+				return self._cached[1]
+			with open(self.path) as f:
+				token = Token.from_dict(json.load(f))
+		except (OSError, ValueError, KeyError, TypeError) as err:
+			raise MissingTokenError(self.path) from err
+		self._cached = (mtime, token)
+		return token
+
+	def set(self, token: Token):
+		with self.lock():
+			directory = os.path.dirname(self.path) or '.'
+			os.makedirs(directory, mode=0o700, exist_ok=True)
+			fd, tmp = tempfile.mkstemp(dir=directory, prefix='.token-')
+			try:
+				with os.fdopen(fd, 'w') as f:
+					json.dump(token.to_dict(), f)
+					f.flush()
+					os.fsync(f.fileno())
+				os.replace(tmp, self.path)
+			except BaseException:
+				os.unlink(tmp)
+				raise
+
+	@contextmanager
+	def lock(self) -> Iterator[None]:
+		"""Exclusive lock across processes, reentrant within one."""
+		with self._mutex:
+			if self._depth == 0 and fcntl:
+				os.makedirs(os.path.dirname(self.path) or '.', mode=0o700, exist_ok=True)
+				self._lock_fd = os.open(f'{self.path}.lock', os.O_RDWR | os.O_CREAT, 0o600)
+				fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+			self._depth += 1
+			try:
+				yield
+			finally:
+				self._depth -= 1
+				if self._depth == 0 and self._lock_fd >= 0:
+					os.close(self._lock_fd)
+					self._lock_fd = -1
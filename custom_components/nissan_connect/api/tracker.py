@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterator
+import asyncio
+import logging
+import random
+
+from .error import RequestTimeoutError
+from .metrics import Metrics
+from .schema import RequestState, RequestStatus, Service
+from .service_history import ServiceHistory
+
+HistoryFetcher = Callable[[], Awaitable[list[RequestStatus]]]
+RequestPoller = Callable[[Service, str], Awaitable[RequestStatus]]
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PollPolicy():
+	"""How often, and for how long, to poll a remote command for its result."""
+	first_delay: float = 2
+	multiplier: float = 1.5
+	max_delay: float = 20
+	jitter: float = 0.2
+	deadline: float = 180
+
+	def delays(self) -> Iterator[float]:
+		delay = self.first_delay
+		while True:
+			yield delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+			delay = min(self.max_delay, delay * self.multiplier)
+
+
+@dataclass
+class _PendingRequest():
+	service: Service
+	future: asyncio.Future[RequestStatus]
+	polls: int = 0
+
+
+class RequestTracker():
+	"""Follow all remote commands in flight of one vehicle with a single poll loop.
+
+	Each tick fetches the service history once, merged into `history`, and
+	completes every pending request it lists as no longer INITIATED. Only a
+	request the history does not list yet, or every request when the history
+	cannot be fetched, is looked up on its own. A new request restarts the
+	backoff of the policy, and a request still pending after the policy
+	deadline fails with RequestTimeoutError.
+	"""
+	def __init__(
+		self,
+		history: ServiceHistory,
+		fetch_history: HistoryFetcher,
+		poll_request: RequestPoller,
+		policy: PollPolicy = PollPolicy(),
+		*,
+		metrics: Metrics | None = None,
+	) -> None:
+		self.history = history
+		self.policy = policy
+		self.metrics = metrics
+		self.ticks = 0
+		self._fetch_history = fetch_history
+		self._poll_request = poll_request
+		self._pending: dict[str, _PendingRequest] = {}
+		self._added = asyncio.Event()
+		self._loop: asyncio.Task[None] | None = None
+
+	def pending(self) -> list[str]:
+		return list(self._pending)
+
+	async def follow(self, service: Service, request_id: str) -> RequestStatus:
+		"""Wait until a request leaves INITIATED."""
+		pending = self._pending[request_id] = _PendingRequest(
+			service, asyncio.get_running_loop().create_future(),
+		)
+		self._added.set()
+		if self._loop is None:
+			self._loop = asyncio.create_task(self._run())
+		try:
+			async with asyncio.timeout(self.policy.deadline):
+				return await pending.future
+		except TimeoutError as err:
+			raise RequestTimeoutError(f'No result after {self.policy.deadline}s') from err
+		finally:
+			del self._pending[request_id]
+			if self.metrics:
+				self.metrics.observe_polls(pending.polls)
+
+	async def _run(self):
+		try:
+			delays = self.policy.delays()
+			while self._waiting():
+				self._added.clear()
+				try:
+					await asyncio.wait_for(self._added.wait(), next(delays))
+				except TimeoutError:
+					# followers leave after the tick that completed them, do not fetch for nothing
+					if not self._waiting():
+						break
+					await self._tick()
+				else:
+					delays = self.policy.delays()
+		finally:
+			self._loop = None
+
+	def _waiting(self) -> bool:
+		return any(not pending.future.done() for pending in self._pending.values())
+
+	async def _tick(self):
+		self.ticks += 1
+		fetched = True
+		try:
+			await self._fetch_history()
+		except Exception as err:
+			fetched = False
+			_LOGGER.debug(f'Service history unavailable, polling requests one by one: {err!r}')
+
+		for request_id, pending in list(self._pending.items()):
+			if pending.future.done():
+				continue
+			pending.polls += 1
+			# entries merged by earlier ticks are outdated once a fetch failed
+			status = self.history.by_id.get(request_id) if fetched else None
+			if status is None:
+				try:
+					status = await self._poll_request(pending.service, request_id)
+				except Exception as err:
+					if not pending.future.done():
+						pending.future.set_exception(err)
+					continue
+			if status.status != RequestState.INITIATED and not pending.future.done():
+				pending.future.set_result(status)
+
+	def close(self):
+		"""Stop polling and cancel the pending requests."""
+		if self._loop:
+			self._loop.cancel()
+		for pending in self._pending.values():
+			pending.future.cancel()
@@ -0,0 +1,119 @@
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from math import asin, cos, radians, sin, sqrt
+from typing import Iterator
+
+EARTH_RADIUS = 6371008.8
+
+
+def distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+	"""Great circle distance in meters."""
+	dlat = radians(lat2 - lat1)
+	dlon = radians(lon2 - lon1)
+	a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+	return 2 * EARTH_RADIUS * asin(sqrt(a))
+
+
+@dataclass(frozen=True, slots=True)
+class Trip():
+	start: float
+	end: float
+	distance: float
+	samples: int
+
+	@property
+	def duration(self) -> float:
+		return self.end - self.start
+
+
+class LocationHistory():
+	"""Bounded history of vehicle positions, split into trips.
+
+	Samples are `(timestamp, latitude, longitude)` kept in fixed size arrays
+	used as a ring buffer, so memory does not grow with time. A sample closer
+	than `min_distance` meters to the last kept one is not stored, which keeps
+	one point per parking spot however often the vehicle is polled. A trip
+	starts with the first movement and ends once the vehicle has not moved for
+	`stop_after` seconds.
+	"""
+	def __init__(
+		self,
+		capacity: int = 2880,
+		*,
+		min_distance: float = 50,
+		stop_after: float = 600,
+		max_trips: int = 20,
+	) -> None:
+		self.capacity = capacity
+		self.min_distance = min_distance
+		self.stop_after = stop_after
+		self.trips: deque[Trip] = deque(maxlen=max_trips)
+		self.current: Trip | None = None
+		self._timestamps = array('d', bytes(8 * capacity))
+		self._latitudes = array('d', bytes(8 * capacity))
+		self._longitudes = array('d', bytes(8 * capacity))
+		self._start = 0
+		self._len = 0
+		# latest sample time, stationary samples only update this
+		self._last_seen = 0.0
+
+	def __len__(self) -> int:
+		return self._len
+
+	def __iter__(self) -> Iterator[tuple[float, float, float]]:
+		for i in range(self._len):
+			j = (self._start + i) % self.capacity
+			yield self._timestamps[j], self._latitudes[j], self._longitudes[j]
+
+	def last(self) -> tuple[float, float, float] | None:
+		if not self._len:
+			return None
+		j = (self._start + self._len - 1) % self.capacity
+		return self._timestamps[j], self._latitudes[j], self._longitudes[j]
+
+	def _append(self, timestamp: float, latitude: float, longitude: float):
+		if self._len < self.capacity:
+			j = (self._start + self._len) % self.capacity
+			self._len += 1
+		else:
+			j = self._start
+			self._start = (self._start + 1) % self.capacity
+		self._timestamps[j] = timestamp
+		self._latitudes[j] = latitude
+		self._longitudes[j] = longitude
+
+	def add(self, timestamp: float, latitude: float, longitude: float) -> bool:
+		"""Record a position, returns whether the current or the recent trips changed."""
+		if not (last := self.last()):
+			self._append(timestamp, latitude, longitude)
+			self._last_seen = timestamp
+			return False
+
+		if timestamp < self._last_seen:
+			return False
+		last_seen, self._last_seen = self._last_seen, timestamp
+
+		_, last_latitude, last_longitude = last
+
+		moved = distance(last_latitude, last_longitude, latitude, longitude)
+		if moved < self.min_distance:
+			if self.current and timestamp - self.current.end >= self.stop_after:
+				self.trips.append(self.current)
+				self.current = None
+				return True
+			return False
+
+		self._append(timestamp, latitude, longitude)
+		if self.current:
+			self.current = Trip(
+				self.current.start, timestamp, self.current.distance + moved, self.current.samples + 1,
+			)
+		else:
+			# the vehicle left its parking spot some time after it was last seen there
+			self.current = Trip(last_seen, timestamp, moved, 2)
+		return True
+
+	def recent_trips(self) -> list[Trip]:
+		"""Completed trips followed by the one in progress, oldest first."""
+		return [*self.trips, *((self.current,) if self.current else ())]
@@ -1,24 +1,56 @@
-from typing import Callable
+from time import perf_counter
+from typing import Awaitable, Callable, Mapping
+import json
 import logging
 
-from pydantic import TypeAdapter
+from aiohttp import ClientError
 from requests import Session
 
 from .const import CV_BASE_URL
-from .auth import TokenAuth
+from .auth import AsyncTokenAuth, TokenAuth
+from .breaker import CircuitBreaker
+from .cache import ResponseCache
+from .commands import CommandQueue
+from .error import ApiError, CircuitOpenError, RateLimitedError
+from .metrics import Metrics
+from .ratelimit import RateLimiter, parse_retry_after
+from .service_history import ServiceHistory
+from .tracker import PollPolicy, RequestTracker
 from .schema import (
 	RemoteCommand,
 	Service,
 	RequestStatus,
 	LocationStatus,
 	VehicleStatus,
+	location_status_adapter,
+	request_status_adapter,
+	service_history_adapter,
+	vehicle_status_adapter,
 )
 
 RequestStatusTracker = Callable[[], RequestStatus]
+AsyncRequestStatusTracker = Callable[[], Awaitable[RequestStatus]]
 JSON = dict[str, 'JSON'] | list['JSON'] | int | str | float | bool | type[None]
 _LOGGER = logging.getLogger(__name__)
 
 
+def _raise_for_status(status: int, headers: Mapping[str, str], service: Service):
+	if status == 429:
+		raise RateLimitedError(
+			f'Service "{service.name}" throttled',
+			parse_retry_after(headers.get('Retry-After')),
+		)
+	if status >= 400:
+		raise ApiError(f'Service "{service.name}" failed with HTTP {status}', status)
+
+
+def _is_outage(err: Exception) -> bool:
+	"""Whether an error means the API is down, rather than the request being refused."""
+	if isinstance(err, ApiError):
+		return err.status >= 500
+	return isinstance(err, (ClientError, TimeoutError))
+
+
 class Vehicle():
 	def __init__(
 		self,
@@ -26,51 +58,102 @@ class Vehicle():
 		vin: str,
 		*,
 		pin: str = '',
-		base_url: str=CV_BASE_URL
+		base_url: str=CV_BASE_URL,
+		cache_ttl: float = 0,
+		metrics: Metrics | None = None,
+		session: Session | None = None,
 	):
 		self.base_url = base_url
 		self.vin = vin
 		self.pin = pin
-		self.session = Session()
+		self.cache = ResponseCache(cache_ttl)
+		self.metrics = metrics
+		# the vin is sent per request, so vehicles of one thread may share a session
+		self.session = session or Session()
 		self.session.auth = auth
-		self.session.headers.update({
-			'vin': self.vin,
-		})
+		self.headers = {'vin': self.vin}
 
-	def get_status(self, service: Service, request_id: str = '') -> JSON:
-		r = self.session.get(f'{self.base_url}/{service.value}/{request_id}').json()
-		_LOGGER.debug(f'Service "{service.name}" response: {r}')
+	def get_raw(self, service: Service, request_id: str = '') -> bytes:
+		# request status lookups change until they complete and are never cached
+		cached = not request_id
+		if cached and (entry := self.cache.lookup(service)):
+			return entry.body
+		return self._get_raw(service, request_id)
+
+	def _get_raw(self, service: Service, request_id: str, *, conditional: bool = True) -> bytes:
+		cached = not request_id
+		start = perf_counter() if self.metrics else 0
+		ok = False
+		try:
+			resp = self.session.get(
+				f'{self.base_url}/{service.value}/{request_id}',
+				headers=self.headers | self.cache.conditional_headers(service) if cached and conditional else self.headers,
+			)
+			ok = resp.ok
+		finally:
+			if self.metrics:
+				self.metrics.observe(service.name.lower(), perf_counter() - start, error=not ok)
+
+		_raise_for_status(resp.status_code, resp.headers, service)
+		if resp.status_code == 304:
+			if entry := self.cache.revalidate(service):
+				return entry.body
+			if not conditional:
+				raise ApiError(f'Service "{service.name}" answered 304 without validators', 304)
+			# the entry was invalidated while in flight, a 304 has no body to serve
+			return self._get_raw(service, request_id, conditional=False)
+		r = resp.content
+		if cached and resp.ok:
+			self.cache.store(service, r, resp.headers)
+		_LOGGER.debug(f'Service "{service.name}" response: {r!r}')
 		return r
 
+	def get_status(self, service: Service, request_id: str = '') -> JSON:
+		return json.loads(self.get_raw(service, request_id))
+
 	def send_command(self, command: RemoteCommand) -> RequestStatusTracker:
 		data = {'command': str(command)}
 		if self.pin:
 			data['pin'] = self.pin
 
-		r = self.session.post(f'{self.base_url}/{command.service.value}', json=data).json()
+		self.cache.invalidate(command.service)
+		start = perf_counter() if self.metrics else 0
+		ok = False
+		try:
+			resp = self.session.post(
+				f'{self.base_url}/{command.service.value}', json=data, headers=self.headers,
+			)
+			ok = resp.ok
+		finally:
+			if self.metrics:
+				self.metrics.observe(
+					f'{command.service.name.lower()}_command', perf_counter() - start, error=not ok
+				)
+		_raise_for_status(resp.status_code, resp.headers, command.service)
+		r = resp.json()
 		_LOGGER.debug(f'Service "{command.service.name}::{command.name}" response: {r}')
 
 		request_id = r['serviceRequestId']
 		def status_tracker():
-			return RequestStatus.parse_obj(
-				self.get_status(command.service, request_id)
+			return request_status_adapter.validate_json(
+				self.get_raw(command.service, request_id)
 			)
 
 		return status_tracker
 
 	def vehicle_status(self) -> VehicleStatus:
-		return VehicleStatus.parse_obj(
-			self.get_status(Service.VEHICLE_STATUS)
+		return vehicle_status_adapter.validate_json(
+			self.get_raw(Service.VEHICLE_STATUS)
 		)
 
 	def location(self) -> LocationStatus:
-		return LocationStatus.parse_obj(
-			self.get_status(Service.LOCATION)
+		return location_status_adapter.validate_json(
+			self.get_raw(Service.LOCATION)
 		)
 
 	def service_history(self) -> list[RequestStatus]:
-		return TypeAdapter(list[RequestStatus]).validate_python(
-			self.get_status(Service.SERVICE_HISTORY)
+		return service_history_adapter.validate_json(
+			self.get_raw(Service.SERVICE_HISTORY)
 		)
 
 	def door_lock(self) -> RequestStatusTracker:
@@ -96,3 +179,216 @@ class Vehicle():
 
 	def horn_and_lights(self) -> RequestStatusTracker:
 		return self.send_command(RemoteCommand.HORN_LIGHT)
+
+
+class AsyncVehicle():
+	def __init__(
+		self,
+		auth: AsyncTokenAuth,
+		vin: str,
+		*,
+		pin: str = '',
+		base_url: str=CV_BASE_URL,
+		poll_policy: PollPolicy = PollPolicy(),
+		cache_ttl: float = 0,
+		metrics: Metrics | None = None,
+		rate_limiter: RateLimiter | None = None,
+		breakers: dict[Service, CircuitBreaker] | None = None,
+	):
+		self.base_url = base_url
+		self.vin = vin
+		self.pin = pin
+		self.poll_policy = poll_policy
+		self.rate_limiter = rate_limiter
+		self.breakers = breakers
+		self.cache = ResponseCache(cache_ttl)
+		self.metrics = metrics
+		self.auth = auth
+		self.session = auth.session
+		self.commands = CommandQueue(self.run_command)
+		self.service_requests = ServiceHistory()
+		self.requests = RequestTracker(
+			self.service_requests,
+			lambda: self.sync_service_history(follow=True),
+			self._poll_request,
+			poll_policy,
+			metrics=metrics,
+		)
+
+	async def _headers(self) -> dict[str, str]:
+		return await self.auth.headers() | {'vin': self.vin}
+
+	async def _acquire(self, *, priority: bool):
+		if self.rate_limiter:
+			await self.rate_limiter.acquire(priority=priority)
+
+	def _check_response(self, status: int, headers: Mapping[str, str], service: Service):
+		try:
+			_raise_for_status(status, headers, service)
+		except RateLimitedError as err:
+			if self.rate_limiter:
+				self.rate_limiter.throttle(err.retry_after)
+			raise
+
+	async def get_raw(self, service: Service, request_id: str = '', *, follow: bool = False) -> bytes:
+		"""A service response, `follow` fetches it fresh to follow remote commands."""
+		# request status lookups change until they complete and are never cached
+		cached = not request_id
+		if cached and not follow and (entry := self.cache.lookup(service)):
+			return entry.body
+
+		# polling is cut off during outages, following commands never is
+		if follow or not cached or self.breakers is None:
+			return await self._get_raw(service, request_id, priority=follow or not cached)
+
+		breaker = self.breakers.setdefault(service, CircuitBreaker())
+		if not breaker.allow():
+			raise CircuitOpenError(
+				f'Service "{service.name}" is failing, next attempt in {breaker.retry_in():.0f}s',
+				breaker.retry_in(),
+			)
+		try:
+			r = await self._get_raw(service, request_id, priority=False)
+		except Exception as err:
+			if _is_outage(err):
+				breaker.record_failure()
+			else:
+				breaker.abandon()
+			raise
+		except BaseException:
+			breaker.abandon()
+			raise
+		breaker.record_success()
+		return r
+
+	async def _get_raw(
+		self, service: Service, request_id: str, *, priority: bool, conditional: bool = True,
+	) -> bytes:
+		cached = not request_id
+		# following commands shares the priority budget of the commands
+		await self._acquire(priority=priority)
+		headers = await self._headers()
+		if cached and conditional:
+			headers |= self.cache.conditional_headers(service)
+
+		start = perf_counter() if self.metrics else 0
+		ok = False
+		try:
+			async with self.session.get(
+				f'{self.base_url}/{service.value}/{request_id}', headers=headers,
+			) as resp:
+				r = await resp.read()
+				ok = resp.ok
+		finally:
+			if self.metrics:
+				self.metrics.observe(service.name.lower(), perf_counter() - start, error=not ok)
+
+		self._check_response(resp.status, resp.headers, service)
+		if resp.status == 304:
+			if entry := self.cache.revalidate(service):
+				return entry.body
+			if not conditional:
+				raise ApiError(f'Service "{service.name}" answered 304 without validators', 304)
+			# the entry was invalidated while in flight, a 304 has no body to serve
+			return await self._get_raw(service, request_id, priority=priority, conditional=False)
+		if cached and resp.ok:
+			self.cache.store(service, r, resp.headers)
+		_LOGGER.debug(f'Service "{service.name}" response: {r!r}')
+		return r
+
+	async def get_status(self, service: Service, request_id: str = '') -> JSON:
+		return json.loads(await self.get_raw(service, request_id))
+
+	async def send_command(self, command: RemoteCommand) -> AsyncRequestStatusTracker:
+		request_id = await self._post_command(command)
+		async def status_tracker():
+			return await self._poll_request(command.service, request_id)
+
+		return status_tracker
+
+	async def _post_command(self, command: RemoteCommand) -> str:
+		data = {'command': str(command)}
+		if self.pin:
+			data['pin'] = self.pin
+
+		self.cache.invalidate(command.service)
+		await self._acquire(priority=True)
+		headers = await self._headers()
+		start = perf_counter() if self.metrics else 0
+		ok = False
+		try:
+			async with self.session.post(
+				f'{self.base_url}/{command.service.value}', json=data, headers=headers,
+			) as resp:
+				ok = resp.ok
+				self._check_response(resp.status, resp.headers, command.service)
+				r = await resp.json(content_type=None)
+		finally:
+			if self.metrics:
+				self.metrics.observe(
+					f'{command.service.name.lower()}_command', perf_counter() - start, error=not ok
+				)
+		_LOGGER.debug(f'Service "{command.service.name}::{command.name}" response: {r}')
+
+		return r['serviceRequestId']
+
+	async def _poll_request(self, service: Service, request_id: str) -> RequestStatus:
+		return request_status_adapter.validate_json(await self.get_raw(service, request_id))
+
+	async def run_command(self, command: RemoteCommand) -> RequestStatus:
+		"""Send a command and follow it until it completes.
+
+		Commands in flight at once are followed together by `requests`. Prefer
+		submitting through `commands`, which serializes and coalesces them.
+		"""
+		request_id = await self._post_command(command)
+		try:
+			return await self.requests.follow(command.service, request_id)
+		finally:
+			# ticks while the command was followed may have cached its pre-completion state
+			self.cache.invalidate(command.service)
+
+	async def vehicle_status(self) -> VehicleStatus:
+		return vehicle_status_adapter.validate_json(
+			await self.get_raw(Service.VEHICLE_STATUS)
+		)
+
+	async def location(self) -> LocationStatus:
+		return location_status_adapter.validate_json(
+			await self.get_raw(Service.LOCATION)
+		)
+
+	async def service_history(self) -> list[RequestStatus]:
+		return service_history_adapter.validate_json(
+			await self.get_raw(Service.SERVICE_HISTORY)
+		)
+
+	async def sync_service_history(self, *, follow: bool = False) -> list[RequestStatus]:
+		"""Merge the service history into `service_requests`, returns the new and changed entries."""
+		return self.service_requests.sync(
+			await self.get_raw(Service.SERVICE_HISTORY, follow=follow)
+		)
+
+	async def door_lock(self) -> AsyncRequestStatusTracker:
+		return await self.send_command(RemoteCommand.LOCK)
+
+	async def door_unlock(self) -> AsyncRequestStatusTracker:
+		return await self.send_command(RemoteCommand.UNLOCK)
+
+	async def engine_start(self) -> AsyncRequestStatusTracker:
+		return await self.send_command(RemoteCommand.START)
+
+	async def engine_stop(self) -> AsyncRequestStatusTracker:
+		return await self.send_command(RemoteCommand.STOP)
+
+	async def engine_double_start(self) -> AsyncRequestStatusTracker:
+		return await self.send_command(RemoteCommand.DOUBLE_START)
+
+	async def horn(self) -> AsyncRequestStatusTracker:
+		return await self.send_command(RemoteCommand.HORN_ONLY)
+
+	async def lights(self) -> AsyncRequestStatusTracker:
+		return await self.send_command(RemoteCommand.LIGHT_ONLY)
+
+	async def horn_and_lights(self) -> AsyncRequestStatusTracker:
+		return await self.send_command(RemoteCommand.HORN_LIGHT)
@@ -28,7 +28,7 @@ async def async_setup_entry(
     )
 
     async_add_entities(
-        [cls(config_entry.runtime_data.status, sensor) for (cls, sensors) in sensor_types for sensor in sensors]
+        [cls(config_entry.runtime_data.coordinator, sensor) for (cls, sensors) in sensor_types for sensor in sensors]
     )
 
 
@@ -120,14 +120,20 @@ MALFUNCTION_SENSORS: tuple[BinarySensorEntityDescription, ...] = (
 class NissanLockSensor(NissanCoordinatorEntity[VehicleStatus], BinarySensorEntity):
     """Nissan door sensor."""
 
+    _snapshot_part = 'status'
+    _field_path = 'lockStatus.{key}'
+
     @property
     def is_on(self) -> bool:
-        return self.data.lockStatus[self.entity_description.key] == DoorState.OPEN
+        return self.value == DoorState.OPEN
 
 
 class NissanMalfunctionIndicatorLamp(NissanCoordinatorEntity[VehicleStatus], BinarySensorEntity):
     """Nissan malfunction indicator lamp sensor."""
 
+    _snapshot_part = 'status'
+    _field_path = 'healthStatus.malfunctionIndicatorLamps.{key}'
+
     @property
     def is_on(self) -> bool:
-        return self.data.healthStatus.malfunctionIndicatorLamps[self.entity_description.key]
+        return self.value
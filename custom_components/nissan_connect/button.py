@@ -1,5 +1,3 @@
-import functools as ft
-
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -8,6 +6,7 @@ from homeassistant.components.button import ButtonEntity, ButtonEntityDescriptio
 from .api.schema import RemoteCommand
 
 from . import RuntimeData
+from .coordinator import NissanDataUpdateCoordinator
 from .entity import NissanEntity
 
 
@@ -17,7 +16,7 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the BMW buttons from config entry."""
-    async_add_entities([NissanButton(config_entry.runtime_data.vehicle, button) for button in BUTTON_TYPES])
+    async_add_entities([NissanButton(config_entry.runtime_data.coordinator, button) for button in BUTTON_TYPES])
 
 
 BUTTON_TYPES: list[ButtonEntityDescription] = [
@@ -59,11 +58,14 @@ BUTTON_TYPES: list[ButtonEntityDescription] = [
 class NissanButton(NissanEntity, ButtonEntity):
     """Representation of a NissanConnect button."""
 
+    def __init__(
+        self,
+        coordinator: NissanDataUpdateCoordinator,
+        entity_description: ButtonEntityDescription,
+    ) -> None:
+        """Initialize button."""
+        super().__init__(coordinator, entity_description)
+
     async def async_press(self) -> None:
         """Press the button."""
-        await self._async_send_command(
-            ft.partial(
-                self._vehicle.send_command,
-                RemoteCommand[self.entity_description.key],
-            ),
-        )
+        await self._async_send_command(RemoteCommand[self.entity_description.key])
@@ -8,11 +8,26 @@ from homeassistant.const import (
     CONF_PASSWORD,
     CONF_PIN,
 )
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .api.auth import TokenAuth
+from .api.auth import AsyncTokenAuth
 
 from . import DOMAIN
-from .const import CONF_VIN, CONF_TOKEN
+from .const import (
+    CONF_VIN,
+    CONF_TOKEN,
+    CONF_POOL_SIZE,
+    CONF_POOL_SIZE_PER_HOST,
+    CONF_COMMAND_TIMEOUT,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_METRICS,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_POOL_SIZE_PER_HOST,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+)
 
 USER_SCHEMA = vol.Schema({
     vol.Required(CONF_USERNAME): str,
@@ -24,17 +39,34 @@ VEHICLE_SCHEMA = vol.Schema({
     vol.Required(CONF_PIN): str,
 })
 
+OPTIONS_SCHEMA = vol.Schema({
+    vol.Optional(CONF_MIN_SCAN_INTERVAL, default=DEFAULT_MIN_SCAN_INTERVAL): vol.All(
+        vol.Coerce(int), vol.Range(min=1)
+    ),
+    vol.Optional(CONF_MAX_SCAN_INTERVAL, default=DEFAULT_MAX_SCAN_INTERVAL): vol.All(
+        vol.Coerce(int), vol.Range(min=1)
+    ),
+    vol.Optional(CONF_POOL_SIZE, default=DEFAULT_POOL_SIZE): vol.All(
+        vol.Coerce(int), vol.Range(min=1)
+    ),
+    vol.Optional(CONF_POOL_SIZE_PER_HOST, default=DEFAULT_POOL_SIZE_PER_HOST): vol.All(
+        vol.Coerce(int), vol.Range(min=0)
+    ),
+    vol.Optional(CONF_COMMAND_TIMEOUT, default=DEFAULT_COMMAND_TIMEOUT): vol.All(
+        vol.Coerce(int), vol.Range(min=10)
+    ),
+    vol.Optional(CONF_METRICS, default=False): bool,
+})
+
 
 async def generate_token(
     hass: core.HomeAssistant, username: str, password: str
 ) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
 
-    auth = TokenAuth()
+    auth = AsyncTokenAuth(async_get_clientsession(hass))
     try:
-        await hass.async_add_executor_job(
-            auth.generate, username, password
-        )
+        await auth.generate(username, password)
     except Exception as ex:
         raise CannotConnect from ex
 
@@ -46,6 +78,13 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @core.callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        return OptionsFlow()
+
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         self._current: dict[str, Any] = {}
@@ -144,5 +183,22 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             self._reason = reason
 
 
+class OptionsFlow(config_entries.OptionsFlow):
+    """Handle Nissan options."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.ConfigFlowResult:
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(
+                OPTIONS_SCHEMA, self.config_entry.options
+            ),
+        )
+
+
 class CannotConnect(exceptions.HomeAssistantError):
     """Error to indicate we cannot connect."""
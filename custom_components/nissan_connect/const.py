@@ -1,5 +1,39 @@
+from datetime import timedelta
+
 DOMAIN = "nissan_connect"
 ATTRIBUTION = "Data provided by NissanConnectedServices"
 
 CONF_TOKEN = "token"
 CONF_VIN = "vin"
+
+# renew tokens in the background once this fraction of their lifetime has passed
+TOKEN_RENEW_FRACTION = 0.8
+
+CONF_POOL_SIZE = "pool_size"
+CONF_POOL_SIZE_PER_HOST = "pool_size_per_host"
+CONF_COMMAND_TIMEOUT = "command_timeout"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_METRICS = "metrics"
+
+# connection pool shared by all vehicles of an account
+DEFAULT_POOL_SIZE = 20
+DEFAULT_POOL_SIZE_PER_HOST = 10
+
+# seconds to wait for a remote command to leave INITIATED
+DEFAULT_COMMAND_TIMEOUT = 180
+
+# minutes between polls while the vehicle is active, and while it is parked
+DEFAULT_MIN_SCAN_INTERVAL = 1
+DEFAULT_MAX_SCAN_INTERVAL = 60
+
+# poll at the minimum interval for this long after a remote command
+COMMAND_ACTIVITY_WINDOW = timedelta(minutes=10)
+
+# seconds a status response is served from cache, e.g. for refreshes after button presses
+RESPONSE_CACHE_TTL = 30
+
+ATTR_LAST_COMMAND_STATUS = "last_command_status"
+ATTR_STALE = "stale"
+ATTR_FETCHED_AT = "fetched_at"
+COMMAND_TIMEOUT = "TIMEOUT"
@@ -1,46 +1,348 @@
 """Coordinator for Nissan."""
 from __future__ import annotations
-from typing import Callable, TypeVar
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Literal, NamedTuple
+import asyncio
 import logging
-import functools as ft
-from datetime import timedelta
+import time
+from datetime import datetime, timedelta
 
-from homeassistant.core import HomeAssistant
+from pydantic import ValidationError
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
+from homeassistant.util import dt as dt_util
 
-from .api.error import TokenAuthError
-from .api.vehicle import Vehicle
+from .api.diff import diff, parents, resolve
+from .api.error import CircuitOpenError, TokenAuthError
+from .api.schema import (
+    LocationStatus,
+    VehicleStatus,
+    location_status_adapter,
+    vehicle_status_adapter,
+)
+from .api.trips import LocationHistory
+from .api.vehicle import AsyncVehicle
+from .const import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
-_SCAN_INTERVAL = timedelta(minutes=5)
 
-_T = TypeVar("_T")
+SnapshotPart = Literal['status', 'location']
+# listener context of entities showing the remote service history
+SERVICE_HISTORY = 'service_history'
+
+
+class Field(NamedTuple):
+    """Listener context of a single field of a snapshot part."""
+    part: SnapshotPart
+    # a path of api.diff, e.g. `lockStatus.doorStatusFrontLeft`
+    path: str
+
+SNAPSHOT_STORAGE_VERSION = 1
+# seconds to coalesce snapshot writes over
+SNAPSHOT_SAVE_DELAY = 30
+
+
+@dataclass(frozen=True)
+class VehicleSnapshot():
+    """Latest known telemetry of a vehicle."""
+    status: VehicleStatus | None = None
+    location: LocationStatus | None = None
+    status_fetched_at: datetime | None = None
+    location_fetched_at: datetime | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'status': self.status and self.status.model_dump(mode='json'),
+            'location': self.location and self.location.model_dump(mode='json'),
+            'status_fetched_at': self.status_fetched_at and self.status_fetched_at.isoformat(),
+            'location_fetched_at': self.location_fetched_at and self.location_fetched_at.isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> VehicleSnapshot:
+        fetched_at = lambda key: d.get(key) and dt_util.parse_datetime(d[key])
+        return cls(
+            status=d.get('status') and vehicle_status_adapter.validate_python(d['status']),
+            location=d.get('location') and location_status_adapter.validate_python(d['location']),
+            status_fetched_at=fetched_at('status_fetched_at'),
+            location_fetched_at=fetched_at('location_fetched_at'),
+        )
+
+
+def snapshot_store(hass: HomeAssistant, vin: str) -> Store[dict[str, Any]]:
+    """Storage of the last known snapshot of a vehicle."""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f'{DOMAIN}.{vin}.snapshot')
+
+
+class AdaptiveInterval():
+    """Poll interval that follows vehicle activity.
+
+    The interval drops to the minimum while the vehicle is active and grows
+    geometrically up to the maximum while nothing changes.
+    """
+    def __init__(
+        self,
+        minimum: timedelta,
+        maximum: timedelta,
+        *,
+        factor: float = 2,
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.factor = factor
+        self.current = minimum
+        self._boost_until = 0.0
+
+    def boost(self, window: timedelta) -> None:
+        """Poll at the minimum interval for the given window."""
+        self._boost_until = max(self._boost_until, time.monotonic() + window.total_seconds())
+        self.current = self.minimum
+
+    def next(self, active: bool) -> timedelta:
+        if active or time.monotonic() < self._boost_until:
+            self.current = self.minimum
+        else:
+            self.current = min(self.maximum, self.current * self.factor)
+        return self.current
+
+
+def _is_active(previous: VehicleSnapshot, fresh: VehicleSnapshot) -> bool:
+    """Whether the telemetry moved since the previous snapshot."""
+    if fresh.status is not previous.status and (
+        previous.status is None
+        or fresh.status.lastUpdateTime != previous.status.lastUpdateTime
+    ):
+        return True
+    if fresh.location is not previous.location and (
+        previous.location is None
+        or fresh.location.location != previous.location.location
+    ):
+        return True
+    return False
 
 
-class NissanDataUpdateCoordinator(DataUpdateCoordinator[_T]):
-    """Class to manage fetching Nissan data."""
+class NissanDataUpdateCoordinator(DataUpdateCoordinator[VehicleSnapshot]):
+    """Class to manage fetching Nissan data.
+
+    Status, location and the service history are fetched concurrently in
+    one tick. Listeners registered with a snapshot part as their context
+    are only notified when that part changed, and those registered with a
+    Field only when that field changed. Listeners are indexed by context, so a refresh
+    visits only the listeners it wakes, and the values of subscribed
+    fields are resolved once into `field_values`. Every snapshot is
+    persisted, so a restarted coordinator can start from it before the
+    first refresh. A part that fails to refresh keeps its last good value
+    and is marked stale, the update only fails when there is nothing to
+    serve.
+    """
     def __init__(
         self,
         hass: HomeAssistant,
         *,
-        vehicle: Vehicle,
-        method: Callable[[Vehicle], _T],
+        vehicle: AsyncVehicle,
+        interval: AdaptiveInterval,
     ) -> None:
         """Initialize vehicle-wide Nissan data updater."""
-        self._update_method = ft.partial(hass.async_add_executor_job, method)
         self.vehicle = vehicle
+        self.interval = interval
+        self._updated_parts: set[str] | None = None
+        self._updated_fields: set[Field] = set()
+        self._listener_index: dict[Any, dict[Callable[[], None], CALLBACK_TYPE]] = {}
+        self.field_values: dict[Field, Any] = {}
+        # entity state writes skipped because nothing the entity shows changed
+        self.suppressed_writes = 0
+        self._store = snapshot_store(hass, vehicle.vin)
+        self._snapshot_pending = False
+        # positions and trips, kept in memory only
+        self.history = LocationHistory()
+        # parts served from the last good snapshot because their refresh failed
+        self.stale_parts: set[SnapshotPart] = set()
+        # service history version its listeners last saw
+        self._service_history_version = 0
         name=f'{type(self).__name__} {vehicle.vin}'
-        super().__init__(hass, _LOGGER, name=name, update_interval=_SCAN_INTERVAL)
+        super().__init__(hass, _LOGGER, name=name, update_interval=interval.current)
 
-    async def _async_update_data(self) -> _T:
-        """Update data."""
+    async def async_restore(self) -> bool:
+        """Load the persisted snapshot, returns whether there was one."""
+        if not (stored := await self._store.async_load()):
+            return False
         try:
-            return await self._update_method(self.vehicle)
-        except TokenAuthError as err:
-            raise ConfigEntryAuthFailed() from err
+            snapshot = VehicleSnapshot.from_dict(stored)
+        except ValidationError as err:
+            _LOGGER.warning(f'{self.name}: ignoring stored snapshot: {err}')
+            return False
+        self.data = snapshot
+        return True
+
+    async def async_flush_snapshot(self) -> None:
+        """Write a delayed snapshot now, so none is written once the entry is gone."""
+        if self._snapshot_pending and self.data is not None:
+            self._snapshot_pending = False
+            # also cancels the delayed write
+            await self._store.async_save(self.data.to_dict())
+
+    async def async_boost(self, window: timedelta) -> None:
+        """Poll fast for a while, e.g. after a remote command, starting now."""
+        self.interval.boost(window)
+        await self.async_request_refresh()
+
+    async def _async_merge_service_history(self) -> bool:
+        """Merge the remote service history, returns whether it changed since last notified.
+
+        Following remote commands also merges it, so changes are detected
+        by version rather than by what this sync merged.
+        """
+        try:
+            await self.vehicle.sync_service_history()
         except Exception as err:
-            raise UpdateFailed() from err
+            # the history is optional, auth failures surface through the other parts
+            _LOGGER.debug(f'{self.name}: service history sync failed: {err!r}')
+        version = self.vehicle.service_requests.version
+        if version == self._service_history_version:
+            return False
+        self._service_history_version = version
+        return True
+
+    async def _async_update_data(self) -> VehicleSnapshot:
+        """Update data."""
+        # after a failed refresh every listener must be notified
+        recovering = not self.last_update_success
+        self._updated_parts = None
+
+        # the history also lists commands sent from other clients
+        status, location, history_changed = await asyncio.gather(
+            self.vehicle.vehicle_status(),
+            self.vehicle.location(),
+            self._async_merge_service_history(),
+            return_exceptions=True,
+        )
+        if isinstance(history_changed, BaseException):
+            raise history_changed
+        results: dict[SnapshotPart, VehicleStatus | LocationStatus | BaseException] = {
+            'status': status,
+            'location': location,
+        }
+
+        errors = {
+            part: err for part, err in results.items() if isinstance(err, BaseException)
+        }
+        for err in errors.values():
+            if not isinstance(err, Exception):
+                raise err
+            if isinstance(err, TokenAuthError):
+                raise ConfigEntryAuthFailed() from err
+
+        previous = self.data or VehicleSnapshot()
+        # failed parts keep serving their last good value, flagged as stale
+        stale = {part for part in errors if getattr(previous, part) is not None}
+        if len(errors) == len(results) and not stale:
+            raise UpdateFailed() from next(iter(errors.values()))
+        for part, err in errors.items():
+            # an open circuit skips the request, the failures that opened it were logged
+            log = _LOGGER.debug if isinstance(err, CircuitOpenError) else _LOGGER.warning
+            log(f'{self.name}: keeping previous {part}, update failed: {err!r}')
+        stale_changed = stale ^ self.stale_parts
+        self.stale_parts = stale
+
+        fresh = {part: r for part, r in results.items() if part not in errors}
+        # keep unchanged parts as they were so their listeners stay asleep
+        changed = {
+            part: r for part, r in fresh.items() if r != getattr(previous, part)
+        }
+        now = dt_util.utcnow()
+        trips_changed = isinstance(location, LocationStatus) and self.history.add(
+            now.timestamp(), location.location.latitude, location.location.longitude,
+        )
+        if not recovering:
+            self._updated_parts = set(changed) | stale_changed
+            # trips also end while the location stays the same
+            if trips_changed:
+                self._updated_parts.add('location')
+            if history_changed:
+                self._updated_parts.add(SERVICE_HISTORY)
+            self._updated_fields = self._changed_fields(previous, changed, stale_changed)
+            _LOGGER.debug(
+                f'{self.name}: changed parts {sorted(changed)}, '
+                f'{self.suppressed_writes} entity writes suppressed so far'
+            )
+
+        snapshot = replace(
+            previous, **changed, **{f'{part}_fetched_at': now for part in fresh}
+        )
+        if fresh:
+            self._store.async_delay_save(snapshot.to_dict, SNAPSHOT_SAVE_DELAY)
+            self._snapshot_pending = True
+        self.update_interval = self.interval.next(_is_active(previous, snapshot))
+        return snapshot
+
+    def _changed_fields(
+        self,
+        previous: VehicleSnapshot,
+        changed: dict[SnapshotPart, Any],
+        whole: set[SnapshotPart],
+    ) -> set[Field]:
+        """Subscribed fields that changed, and every field of the `whole` parts."""
+        whole = set(whole)
+        fields: set[Field] = set()
+        for part, value in changed.items():
+            if (old := getattr(previous, part)) is None:
+                whole.add(part)
+                continue
+            for change in diff(old, value):
+                # fields below an added or removed subtree have no change of their own
+                if not change.path or isinstance(change.old, (dict, list)) or isinstance(change.new, (dict, list)):
+                    whole.add(part)
+                    break
+                for path in parents(change.path):
+                    if (field := Field(part, path)) in self.field_values:
+                        fields.add(field)
+        fields.update(field for field in self.field_values if field.part in whole)
+        return fields
+
+    def _resolve(self, field: Field) -> Any:
+        return resolve(self.data and getattr(self.data, field.part), field.path)
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for data updates, indexed by context."""
+        remove = super().async_add_listener(update_callback, context)
+        listeners = self._listener_index.setdefault(context, {})
+        listeners[remove] = update_callback
+        if isinstance(context, Field) and context not in self.field_values:
+            self.field_values[context] = self._resolve(context)
+
+        @callback
+        def remove_listener() -> None:
+            remove()
+            del listeners[remove]
+            if not listeners:
+                del self._listener_index[context]
+                self.field_values.pop(context, None)
+
+        return remove_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update listeners of the changed parts and fields, or all when unknown."""
+        parts, self._updated_parts = self._updated_parts, None
+        fields, self._updated_fields = self._updated_fields, set()
+        if parts is None:
+            self.field_values = {field: self._resolve(field) for field in self.field_values}
+            return super().async_update_listeners()
+
+        for field in fields:
+            self.field_values[field] = self._resolve(field)
+        woken = 0
+        for context in (None, *parts, *fields):
+            for update_callback in list(self._listener_index.get(context, {}).values()):
+                update_callback()
+                woken += 1
+        self.suppressed_writes += len(self._listeners) - woken
@@ -19,7 +19,7 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Nissan tracker from config entry."""
-    async_add_entities([NissanDeviceTracker(config_entry.runtime_data.location, tracker) for tracker in TRACKER_TYPES])
+    async_add_entities([NissanDeviceTracker(config_entry.runtime_data.coordinator, tracker) for tracker in TRACKER_TYPES])
 
 
 TRACKER_TYPES = [
@@ -34,15 +34,18 @@ TRACKER_TYPES = [
 class NissanDeviceTracker(NissanCoordinatorEntity[LocationStatus], TrackerEntity):
     """Nissan device tracker."""
 
+    _snapshot_part = 'location'
+    _field_path = 'location'
+
     @property
     def latitude(self) -> float | None:
         """Return latitude value of the device."""
-        return self.data.location.latitude
+        return self.value and self.value.latitude
 
     @property
     def longitude(self) -> float | None:
         """Return longitude value of the device."""
-        return self.data.location.longitude
+        return self.value and self.value.longitude
 
     @property
     def source_type(self) -> SourceType:
@@ -0,0 +1,52 @@
+"""Diagnostics support for Nissan."""
+from __future__ import annotations
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_PIN, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from . import RuntimeData
+from .const import CONF_TOKEN, CONF_VIN
+
+TO_REDACT = {CONF_TOKEN, CONF_PIN, CONF_USERNAME, CONF_PASSWORD, CONF_VIN}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry[RuntimeData]
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data = entry.runtime_data
+    vehicle = data.vehicle
+    coordinator = data.coordinator
+    return {
+        'entry': {
+            'data': async_redact_data(dict(entry.data), TO_REDACT),
+            'options': dict(entry.options),
+        },
+        'metrics': vehicle.metrics.to_dict() if vehicle.metrics else None,
+        'auth_metrics': vehicle.auth.metrics.to_dict() if vehicle.auth.metrics else None,
+        'throttled': data.account.rate_limiter.throttled,
+        'circuits': {
+            service.name: breaker.state for service, breaker in data.account.breakers.items()
+        },
+        'cache': {
+            'ttl': vehicle.cache.ttl,
+            'hits': vehicle.cache.hits,
+            'misses': vehicle.cache.misses,
+            'revalidations': vehicle.cache.revalidations,
+        },
+        'coordinator': {
+            'last_update_success': coordinator.last_update_success,
+            'update_interval': str(coordinator.update_interval),
+            'suppressed_writes': coordinator.suppressed_writes,
+            'subscribed_fields': len(coordinator.field_values),
+            'stale_parts': sorted(coordinator.stale_parts),
+            'status_fetched_at': coordinator.data and coordinator.data.status_fetched_at,
+            'location_fetched_at': coordinator.data and coordinator.data.location_fetched_at,
+            'location_history': len(coordinator.history),
+            'trips': len(coordinator.history.recent_trips()),
+            'service_requests': len(vehicle.service_requests),
+        },
+    }
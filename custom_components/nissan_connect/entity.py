@@ -1,23 +1,29 @@
 """Coordinator for Nissan."""
 from __future__ import annotations
-from typing import Callable, TypeVar
+from typing import Any, ClassVar, Generic, TypeVar
 import asyncio
 
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity import Entity, EntityDescription
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .api.vehicle import RequestStatusTracker, Vehicle
-from .api.schema import (
-    RequestState,
-    RequestStatus,
+from .api.error import CommandSupersededError, RequestTimeoutError
+from .api.schema import RemoteCommand, RequestStatus
+
+from .const import (
+    DOMAIN,
+    ATTRIBUTION,
+    ATTR_FETCHED_AT,
+    ATTR_LAST_COMMAND_STATUS,
+    ATTR_STALE,
+    COMMAND_ACTIVITY_WINDOW,
+    COMMAND_TIMEOUT,
 )
-
-from .const import DOMAIN, ATTRIBUTION
-from .coordinator import NissanDataUpdateCoordinator
+from .coordinator import Field, NissanDataUpdateCoordinator, SnapshotPart
 
 _T = TypeVar("_T")
-_RemoteCallable = Callable[[], RequestStatusTracker]
 
 
 class NissanEntity(Entity):
@@ -28,15 +34,18 @@ class NissanEntity(Entity):
 
     def __init__(
         self,
-        vehicle: Vehicle,
+        coordinator: NissanDataUpdateCoordinator,
         entity_description: EntityDescription,
         *args,
         **kwargs
     ) -> None:
         """Initialize entity."""
 
+        self._coordinator = coordinator
+        vehicle = coordinator.vehicle
         self._vehicle = vehicle
-        self._current_command: _RemoteCallable | None = None
+        self._current_command: RemoteCommand | None = None
+        self._command_tasks: set[asyncio.Task] = set()
 
         self._attr_extra_state_attributes = {
             "vin": vehicle.vin,
@@ -50,49 +59,120 @@ class NissanEntity(Entity):
 
         super().__init__(*args, **kwargs)
 
-    async def _async_follow_request(
-        self, status_tracker: RequestStatusTracker, delay: int = 2
-    ) -> RequestStatus:
-        while True:
-            await asyncio.sleep(delay)
-            r = await self.hass.async_add_executor_job(status_tracker)
-            if r.status != RequestState.INITIATED:
-                return r
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop following commands of a removed entity."""
+        for task in self._command_tasks:
+            task.cancel()
+        await super().async_will_remove_from_hass()
+
+    async def _async_send_command(self, command: RemoteCommand) -> RequestStatus | None:
+        """Submit a command to the vehicle queue and wait for its outcome.
 
-    async def _async_send_command(self, command: _RemoteCallable) -> RequestStatus:
+        Returns None when a newer command superseded it before it was sent.
+        """
+        task = asyncio.current_task()
+        assert task
+        self._command_tasks.add(task)
         await self._async_pre_send_command(command)
         try:
-            return await self._async_follow_request(
-                await self.hass.async_add_executor_job(command)
-            )
+            r = await self._vehicle.commands.submit(command)
+            self._attr_extra_state_attributes[ATTR_LAST_COMMAND_STATUS] = r.status
+            return r
+        except CommandSupersededError:
+            return None
+        except RequestTimeoutError as err:
+            self._attr_extra_state_attributes[ATTR_LAST_COMMAND_STATUS] = COMMAND_TIMEOUT
+            raise HomeAssistantError(f'{self.entity_id} command did not complete: {err}') from err
         finally:
-            await self._async_post_send_command(command)
+            self._command_tasks.discard(task)
+            # a cancelled command belongs to an entity being removed
+            if not task.cancelling():
+                await self._async_post_send_command(command)
 
-    async def _async_pre_send_command(self, command: _RemoteCallable) -> None:
+    async def _async_pre_send_command(self, command: RemoteCommand) -> None:
         self._current_command = command
         self.async_write_ha_state()
 
-    async def _async_post_send_command(self, command: _RemoteCallable) -> None:
+    async def _async_post_send_command(self, command: RemoteCommand) -> None:
+        await self._coordinator.async_boost(COMMAND_ACTIVITY_WINDOW)
         if self._current_command == command:
             self._current_command = None
         self.async_write_ha_state()
 
 
-class NissanCoordinatorEntity(NissanEntity, CoordinatorEntity[NissanDataUpdateCoordinator[_T]]):
+class NissanCoordinatorEntity(NissanEntity, CoordinatorEntity[NissanDataUpdateCoordinator], Generic[_T]):
     """Common base for Nissan coordinator entities."""
 
+    # the part of the vehicle snapshot the entity reads and subscribes to
+    _snapshot_part: ClassVar[SnapshotPart]
+    # path of the only field of the part the entity shows, formatted with the
+    # description key, the entity then only wakes when that field changed
+    _field_path: ClassVar[str | None] = None
+
     def __init__(
         self,
-        coordinator: NissanDataUpdateCoordinator[_T],
+        coordinator: NissanDataUpdateCoordinator,
         entity_description: EntityDescription,
     ) -> None:
         """Initialize entity."""
-        super().__init__(coordinator.vehicle, entity_description, coordinator)
+        self._written_state: tuple[Any, ...] | None = None
+        self._field: Field | None = None
+        if self._field_path is not None:
+            self._field = Field(
+                self._snapshot_part, self._field_path.format(key=entity_description.key)
+            )
+        super().__init__(
+            coordinator, entity_description, coordinator,
+            self._field or self._snapshot_part,
+        )
+
+    def _state_fingerprint(self) -> tuple[Any, ...]:
+        # like HA, do not read the state of an unavailable entity, its data may be missing
+        if not self.available:
+            return (False,)
+        return (
+            self.available,
+            self.state,
+            self.state_attributes,
+            self.extra_state_attributes,
+        )
 
-    async def _async_post_send_command(self, command: _RemoteCallable) -> None:
-        await self.coordinator.async_request_refresh()
-        return await super()._async_post_send_command(command)
+    @callback
+    def async_write_ha_state(self) -> None:
+        self._written_state = self._state_fingerprint()
+        super().async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when a refresh changed what the entity shows."""
+        if self._state_fingerprint() == self._written_state:
+            self.coordinator.suppressed_writes += 1
+            return
+        super()._handle_coordinator_update()
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.data is not None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        attributes = self._attr_extra_state_attributes
+        if self._snapshot_part not in self.coordinator.stale_parts:
+            return attributes
+        # the age is left to the reader, a ticking age would write state every refresh
+        fetched_at = getattr(self.coordinator.data, f'{self._snapshot_part}_fetched_at')
+        return {
+            **attributes,
+            ATTR_STALE: True,
+            ATTR_FETCHED_AT: fetched_at and fetched_at.isoformat(),
+        }
 
     @property
     def data(self) -> _T:
-        return self.coordinator.data
+        return getattr(self.coordinator.data, self._snapshot_part)
+
+    @property
+    def value(self) -> Any:
+        """The field the entity shows, as resolved by the coordinator."""
+        assert self._field
+        return self.coordinator.field_values[self._field]
@@ -5,7 +5,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.components.lock import LockEntity, LockEntityDescription
 
-from .api.schema import LockState, VehicleStatus
+from .api.schema import LockState, RemoteCommand, VehicleStatus
 
 from . import RuntimeData
 from .entity import NissanCoordinatorEntity
@@ -17,7 +17,7 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Nissan tracker from config entry."""
-    async_add_entities([NissanLock(config_entry.runtime_data.status, lock) for lock in LOCK_TYPES])
+    async_add_entities([NissanLock(config_entry.runtime_data.coordinator, lock) for lock in LOCK_TYPES])
 
 
 LOCK_TYPES = [
@@ -32,24 +32,27 @@ LOCK_TYPES = [
 class NissanLock(NissanCoordinatorEntity[VehicleStatus], LockEntity):
     """Nissan vehicle lock."""
 
+    _snapshot_part = 'status'
+    _field_path = 'lockStatus.lockStatus'
+
     @property
     def is_locked(self) -> bool:
-        return self.data.lockStatus.lockStatus == LockState.LOCKED
+        return self.value == LockState.LOCKED
 
     @property
     def is_locking(self) -> bool:
-        return self._current_command == self._vehicle.door_lock
+        return self._current_command == RemoteCommand.LOCK
 
     @property
     def is_unlocking(self) -> bool:
-        return self._current_command == self._vehicle.door_unlock
+        return self._current_command == RemoteCommand.UNLOCK
 
     async def async_lock(self, **kwargs) -> None:
         self.hass.create_task(
-            self._async_send_command(self._vehicle.door_lock)
+            self._async_send_command(RemoteCommand.LOCK)
         )
 
     async def async_unlock(self, **kwargs) -> None:
         self.hass.create_task(
-            self._async_send_command(self._vehicle.door_unlock)
+            self._async_send_command(RemoteCommand.UNLOCK)
         )
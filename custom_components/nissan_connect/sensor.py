@@ -1,10 +1,14 @@
 """Device tracker for Nissan vehicles."""
 from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Callable
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfPressure
+from homeassistant.const import EntityCategory, UnitOfLength, UnitOfPressure, UnitOfTime
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 from homeassistant.components.sensor import (
     SensorEntity,
     SensorEntityDescription,
@@ -12,10 +16,13 @@ from homeassistant.components.sensor import (
     SensorDeviceClass, # pyright: ignore[reportPrivateImportUsage]
 )
 
-from .api.schema import VehicleStatus
+from .api.metrics import Metrics
+from .api.schema import LocationStatus, RequestStatus, VehicleStatus
+from .api.trips import Trip
 
 from . import RuntimeData
-from .entity import NissanCoordinatorEntity
+from .coordinator import SERVICE_HISTORY, NissanDataUpdateCoordinator
+from .entity import NissanCoordinatorEntity, NissanEntity
 
 
 async def async_setup_entry(
@@ -24,7 +31,12 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Nissan tracker from config entry."""
-    async_add_entities([NissanTirePressureSensor(config_entry.runtime_data.status, sensor) for sensor in TIRE_SENSOR_TYPES])
+    coordinator = config_entry.runtime_data.coordinator
+    async_add_entities([NissanTirePressureSensor(coordinator, sensor) for sensor in TIRE_SENSOR_TYPES])
+    async_add_entities([NissanTripSensor(coordinator, sensor) for sensor in TRIP_SENSOR_TYPES])
+    async_add_entities([NissanServiceHistorySensor(coordinator, sensor) for sensor in SERVICE_HISTORY_SENSOR_TYPES])
+    if coordinator.vehicle.metrics:
+        async_add_entities([NissanMetricSensor(coordinator, sensor) for sensor in METRIC_SENSOR_TYPES])
 
 
 TIRE_TYPES = {
@@ -47,6 +59,186 @@ TIRE_SENSOR_TYPES = {
 class NissanTirePressureSensor(NissanCoordinatorEntity[VehicleStatus], SensorEntity):
     """Nissan tire pressure sensor."""
 
+    _snapshot_part = 'status'
+    _field_path = 'pressure.{key}.value'
+
     @property
     def native_value(self) -> int:
-        return self.data.pressure[self.entity_description.key].value
+        return self.value
+
+
+TRIP_SENSOR_TYPES = [
+    SensorEntityDescription(
+        key='last_trip_distance', name='Last Trip Distance', icon='mdi:map-marker-distance',
+        device_class=SensorDeviceClass.DISTANCE,
+        native_unit_of_measurement=UnitOfLength.KILOMETERS,
+        suggested_display_precision=1,
+    ),
+]
+
+
+def _trip_attributes(trip: Trip) -> dict[str, Any]:
+    return {
+        'start': dt_util.utc_from_timestamp(trip.start).isoformat(),
+        'end': dt_util.utc_from_timestamp(trip.end).isoformat(),
+        'distance_km': round(trip.distance / 1000, 2),
+    }
+
+
+class NissanTripSensor(NissanCoordinatorEntity[LocationStatus], SensorEntity):
+    """Distance of the trip in progress, or of the last one.
+
+    Recent trips are listed in the attributes instead of being recorded as
+    states, the positions themselves stay in the coordinator's bounded history.
+    """
+
+    _snapshot_part = 'location'
+    _unrecorded_attributes = frozenset({'trips'})
+
+    @property
+    def native_value(self) -> float | None:
+        history = self.coordinator.history
+        if trip := history.current or (history.trips[-1] if history.trips else None):
+            return trip.distance / 1000
+        return None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        history = self.coordinator.history
+        return {
+            **super().extra_state_attributes,
+            'moving': history.current is not None,
+            'trips': [_trip_attributes(trip) for trip in history.recent_trips()],
+        }
+
+
+SERVICE_HISTORY_SENSOR_TYPES = [
+    SensorEntityDescription(
+        key='last_remote_command', name='Last Remote Command', icon='mdi:remote',
+    ),
+]
+
+# remote commands listed in the attributes
+SERVICE_HISTORY_RECENT = 10
+
+
+def _request_attributes(status: RequestStatus) -> dict[str, Any]:
+    command = status.command or status.serviceType.command
+    return {
+        'command': command and command.name,
+        'status': status.status.value,
+        'activated': status.activationDateTime and status.activationDateTime.isoformat(),
+        'changed': status.statusChangeDateTime and status.statusChangeDateTime.isoformat(),
+    }
+
+
+class NissanServiceHistorySensor(NissanEntity, CoordinatorEntity[NissanDataUpdateCoordinator], SensorEntity):
+    """Status of the latest remote command, also of those sent from other clients.
+
+    Reads the vehicle's incrementally synced service history, merged with
+    every coordinator tick and after remote commands.
+    """
+
+    _unrecorded_attributes = frozenset({'recent'})
+
+    def __init__(
+        self,
+        coordinator: NissanDataUpdateCoordinator,
+        entity_description: SensorEntityDescription,
+    ) -> None:
+        super().__init__(coordinator, entity_description, coordinator, SERVICE_HISTORY)
+
+    def _latest(self) -> RequestStatus | None:
+        recent = self._vehicle.service_requests.recent(1)
+        return recent[0] if recent else None
+
+    @property
+    def native_value(self) -> str | None:
+        latest = self._latest()
+        return latest and latest.status.value
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        latest = self._latest()
+        if latest is None:
+            return self._attr_extra_state_attributes
+        attributes = _request_attributes(latest)
+        return {
+            **self._attr_extra_state_attributes,
+            'command': attributes['command'],
+            'activated': attributes['activated'],
+            'recent': [
+                _request_attributes(status)
+                for status in self._vehicle.service_requests.recent(SERVICE_HISTORY_RECENT)
+            ],
+        }
+
+
+@dataclass(frozen=True, kw_only=True)
+class NissanMetricSensorEntityDescription(SensorEntityDescription):
+    value_fn: Callable[[Metrics, Metrics | None], float | int | None]
+
+
+def _latency(key: str) -> Callable[[Metrics, Metrics | None], float | None]:
+    def value(metrics: Metrics, _: Metrics | None) -> float | None:
+        histogram = metrics.latency.get(key)
+        return histogram.mean if histogram else None
+    return value
+
+
+METRIC_SENSOR_TYPES: list[NissanMetricSensorEntityDescription] = [
+    NissanMetricSensorEntityDescription(
+        key='api_requests', name='API Requests', icon='mdi:counter',
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics, _: sum(metrics.requests.values()),
+    ),
+    NissanMetricSensorEntityDescription(
+        key='api_errors', name='API Errors', icon='mdi:alert-circle-outline',
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics, _: sum(metrics.errors.values()),
+    ),
+    NissanMetricSensorEntityDescription(
+        key='token_refreshes', name='Token Refreshes', icon='mdi:key-change',
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda _, auth: auth.requests.get('token', 0) if auth else None,
+    ),
+    NissanMetricSensorEntityDescription(
+        key='polls_per_command', name='Polls per Command', icon='mdi:sync',
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics, _: metrics.polls.mean,
+    ),
+    NissanMetricSensorEntityDescription(
+        key='latency_vehicle_status', name='Vehicle Status Latency',
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_latency('vehicle_status'),
+    ),
+    NissanMetricSensorEntityDescription(
+        key='latency_location', name='Location Latency',
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_latency('location'),
+    ),
+]
+
+
+class NissanMetricSensor(NissanEntity, CoordinatorEntity[NissanDataUpdateCoordinator], SensorEntity):
+    """API metrics of a vehicle, refreshed with every coordinator tick."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    entity_description: NissanMetricSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: NissanDataUpdateCoordinator,
+        entity_description: NissanMetricSensorEntityDescription,
+    ) -> None:
+        super().__init__(coordinator, entity_description, coordinator)
+
+    @property
+    def native_value(self) -> float | int | None:
+        vehicle = self._vehicle
+        assert vehicle.metrics
+        return self.entity_description.value_fn(vehicle.metrics, vehicle.auth.metrics)
@@ -0,0 +1,5 @@
+from pathlib import Path
+import sys
+
+# import the api package directly, the integration package needs homeassistant
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'custom_components' / 'nissan_connect'))
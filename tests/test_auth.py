@@ -0,0 +1,146 @@
+"""Token refreshes at the expiry boundary are single-flight."""
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep, time
+import asyncio
+import threading
+
+import pytest
+
+from api.auth import AsyncTokenAuth, TokenAuth, TokenRenewer
+from api.error import TokenAuthError, TokenRefreshError
+from api.token import SimpleTokenStorage, Token
+
+CALLERS = 16
+# long enough for every caller to arrive while the refresh is in flight
+POST_DURATION = 0.2
+
+FRESH_TOKEN = {
+	'nna_refresh_token': 'refresh-2',
+	'access_token': 'access-2',
+	'id_token': 'id-2',
+	'expires_in': 3600,
+}
+
+
+def expiring_storage() -> SimpleTokenStorage:
+	return SimpleTokenStorage(Token('refresh-1', 'access-1', 'id-1', expires_at=int(time()) + 10))
+
+
+class StubResponse():
+	def raise_for_status(self):
+		pass
+
+	def json(self):
+		return FRESH_TOKEN
+
+
+class StubSession():
+	"""Token endpoint of the sync client, counting POSTs."""
+	def __init__(self) -> None:
+		self.posts = 0
+		self._lock = threading.Lock()
+
+	def post(self, url, json):
+		with self._lock:
+			self.posts += 1
+		sleep(POST_DURATION)
+		return StubResponse()
+
+
+class AsyncStubResponse():
+	async def __aenter__(self):
+		await asyncio.sleep(POST_DURATION)
+		return self
+
+	async def __aexit__(self, *exc):
+		return False
+
+	async def json(self, content_type=None):
+		return FRESH_TOKEN
+
+
+class AsyncStubSession():
+	"""Token endpoint of the async client, counting POSTs."""
+	def __init__(self) -> None:
+		self.posts = 0
+
+	def post(self, url, **kwargs):
+		self.posts += 1
+		return AsyncStubResponse()
+
+
+def test_threads_share_one_refresh():
+	auth = TokenAuth(token_storage=expiring_storage())
+	session = auth._session = StubSession()
+	barrier = threading.Barrier(CALLERS)
+
+	def call() -> Token:
+		barrier.wait()
+		return auth.ensure_fresh()
+
+	with ThreadPoolExecutor(max_workers=CALLERS) as executor:
+		tokens = list(executor.map(lambda _: call(), range(CALLERS)))
+
+	assert session.posts == 1
+	assert {token.access_token for token in tokens} == {'access-2'}
+
+
+def test_coroutines_share_one_refresh():
+	async def run() -> list[dict[str, str]]:
+		auth = AsyncTokenAuth(AsyncStubSession(), token_storage=expiring_storage())
+		headers = await asyncio.gather(*(auth.headers() for _ in range(CALLERS)))
+		assert auth.session.posts == 1
+		return headers
+
+	headers = asyncio.run(run())
+	assert {h['Authorization'] for h in headers} == {'Bearer access-2'}
+
+
+@pytest.mark.parametrize('refreshes', [1, 2])
+def test_coroutines_refresh_again_once_expiring(refreshes):
+	async def run() -> int:
+		auth = AsyncTokenAuth(AsyncStubSession(), token_storage=expiring_storage())
+		for _ in range(refreshes):
+			auth.token = Token('refresh-1', 'access-1', 'id-1', expires_at=int(time()) + 10)
+			await asyncio.gather(*(auth.headers() for _ in range(CALLERS)))
+		return auth.session.posts
+
+	assert asyncio.run(run()) == refreshes
+
+
+def test_malformed_token_body_is_a_refresh_error():
+	class MalformedResponse(StubResponse):
+		def json(self):
+			return {'access_token': 'partial'}
+
+	class MalformedSession(StubSession):
+		def post(self, url, json):
+			super().post(url, json)
+			return MalformedResponse()
+
+	auth = TokenAuth(token_storage=expiring_storage())
+	session = auth._session = MalformedSession()
+	with pytest.raises(TokenRefreshError):
+		auth.refresh()
+	assert session.posts == 1
+	assert auth.token.access_token == 'access-1'
+
+
+def test_renewer_stops_on_rejected_refresh_token():
+	class RejectingAuth():
+		token = Token('refresh-1', 'access-1', 'id-1', expires_at=int(time()) + 10, issued_at=int(time()) - 100)
+		refreshes = 0
+
+		async def _refresh_single_flight(self, is_stale):
+			self.refreshes += 1
+			raise TokenAuthError('revoked')
+
+	async def run() -> int:
+		auth = RejectingAuth()
+		renewer = TokenRenewer(auth, retry_min=0)  # type: ignore[arg-type]
+		renewer.start()
+		await asyncio.sleep(0.1)
+		assert renewer._task is None
+		return auth.refreshes
+
+	assert asyncio.run(run()) == 1